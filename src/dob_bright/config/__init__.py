@@ -150,6 +150,20 @@ class DobConfigurableEditor(object):
 
     # ***
 
+    @property
+    @ConfigRoot.setting(
+        _(
+            "Milliseconds a style rule ‘eval’ may take to style one component"
+            " before it's disabled (0 for no limit)."
+        ),
+    )
+    def rules_eval_budget(self):
+        # An eval that takes this long is surely making the Carousel lag,
+        # and the user would rather be told about it.
+        return 50
+
+    # ***
+
 
 # ***
 
@@ -18,6 +18,7 @@
 """Fact Editing State Machine"""
 
 from collections import namedtuple
+from collections.abc import MutableSet
 from gettext import gettext as _
 
 from easy_as_pypi_termio.errors import echo_warning
@@ -31,6 +32,7 @@ from .facts_diff import FactsDiff
 __all__ = (
     "FactDressed",
     # PRIVATE:
+    #  'DirtyReasons',
     #  'FactoidSource',
 )
 
@@ -40,6 +42,85 @@ FactoidSource = namedtuple(
     ("line_num", "line_raw"),
 )
 
+# Most Facts are not parsed from input, so share one (immutable) empty source.
+NO_FACTOID_SOURCE = FactoidSource(None, None)
+
+
+class DirtyReasons(MutableSet):
+    """A set of dirty reason strings, stored as bit flags.
+
+    The known reasons are each assigned a bit, so an empty or small set is
+    just an int, and copying the set is cheap. Any other reason (e.g., from
+    a plugin) is kept in a regular set, which is only created if needed.
+    """
+
+    REASON_BITS = {
+        reason: 1 << idx
+        for idx, reason in enumerate(
+            (
+                "start",
+                "end",
+                "stopped",
+                "squash",
+                "interval-gap",
+                "lsplit",
+                "rsplit",
+                "deleted-squashed",
+                "deleted-starts_before",
+                "deleted-ends_after",
+            )
+        )
+    }
+
+    __slots__ = ("bits", "others")
+
+    def __init__(self, reasons=()):
+        self.bits = 0
+        self.others = None
+        for reason in reasons:
+            self.add(reason)
+
+    def __contains__(self, reason):
+        try:
+            return bool(self.bits & DirtyReasons.REASON_BITS[reason])
+        except (KeyError, TypeError):
+            return self.others is not None and reason in self.others
+
+    def __iter__(self):
+        for reason, bit in DirtyReasons.REASON_BITS.items():
+            if self.bits & bit:
+                yield reason
+        if self.others:
+            yield from self.others
+
+    def __len__(self):
+        return bin(self.bits).count("1") + (len(self.others) if self.others else 0)
+
+    def __repr__(self):
+        return "{}({})".format(self.__class__.__name__, list(self))
+
+    def add(self, reason):
+        try:
+            self.bits |= DirtyReasons.REASON_BITS[reason]
+        except KeyError:
+            if self.others is None:
+                self.others = set()
+            self.others.add(reason)
+
+    def discard(self, reason):
+        try:
+            self.bits &= ~DirtyReasons.REASON_BITS[reason]
+        except KeyError:
+            if self.others is not None:
+                self.others.discard(reason)
+
+    def copy(self):
+        reasons = DirtyReasons()
+        reasons.bits = self.bits
+        if self.others:
+            reasons.others = set(self.others)
+        return reasons
+
 
 class FactDressed(Fact):
     """"""
@@ -49,9 +130,12 @@ class FactDressed(Fact):
     ):
         super(FactDressed, self).__init__(*args, **kwargs)
         # For tracking edits between store saves.
-        self.dirty_reasons = dirty_reasons or set()
+        self.dirty_reasons = DirtyReasons(dirty_reasons or ())
         # For identifying errors in the input.
-        self.parsed_source = FactoidSource(line_num, line_raw)
+        if line_num is None and line_raw is None:
+            self.parsed_source = NO_FACTOID_SOURCE
+        else:
+            self.parsed_source = FactoidSource(line_num, line_raw)
         self.orig_fact = None
         # For Carousel (dob-viewer) navigation.
         self.next_fact = None
@@ -82,12 +166,33 @@ class FactDressed(Fact):
     def copy(self, *args, **kwargs):
         """ """
         new_fact = super(FactDressed, self).copy(*args, **kwargs)
-        new_fact.dirty_reasons = set(list(self.dirty_reasons))
+        new_fact.dirty_reasons = self.dirty_reasons.copy()
         new_fact.parsed_source = self.parsed_source
         new_fact.orig_fact = self.orig_fact or self
         # SKIP: next_fact, prev_fact.
         return new_fact
 
+    def snapshot(self):
+        """Returns a copy that shares this Fact's attribute values.
+
+        Unlike ``copy``, which builds a new Fact from scratch, the snapshot
+        starts with the same attribute values as this Fact, which are not
+        copied (or validated) again. Setting an attribute on either Fact
+        replaces the value for just that Fact, so neither sees the other's
+        edits. (Only the containers, the tags and dirty_reasons, are copied,
+        in case either is edited in place.)
+
+        Use it to keep the original of a Fact that's about to be edited.
+        """
+        new_fact = object.__new__(self.__class__)
+        new_fact.__dict__.update(self.__dict__)
+        new_fact.tags = list(self.tags)
+        new_fact.dirty_reasons = self.dirty_reasons.copy()
+        new_fact.orig_fact = self.orig_fact or self
+        new_fact.next_fact = None
+        new_fact.prev_fact = None
+        return new_fact
+
     # ***
 
     def friendly_diff(self, other, formatted=False, **kwargs):
@@ -240,7 +345,7 @@ class FactDressed(Fact):
         # Mark deleted until edited, so gap is not saved unless edited.
         gap_fact.deleted = True
         # No exceptions! All Fact copies must eventually lead to the original.
-        gap_fact.orig_fact = gap_fact.copy()
+        gap_fact.orig_fact = gap_fact.snapshot()
         return gap_fact
 
     # *** Presentation concerns.
@@ -0,0 +1,367 @@
+# This file exists within 'dob-bright':
+#
+#   https://github.com/tallybark/dob-bright
+#
+# Copyright © 2020 Landon Bouma. All rights reserved.
+#
+# This program is free software:  you can redistribute it  and/or  modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any later version  (GPLv3+).
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY;  without even the implied warranty of MERCHANTABILITY or  FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU  General  Public  License  for  more  details.
+#
+# If you lost the GNU General Public License that ships with this software
+# repository (read the 'LICENSE' file), see <http://www.gnu.org/licenses/>.
+
+"""In-memory Fact time range lookups, for checking many Facts against the store."""
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+from nark.backends.sqlalchemy.managers import query_prepare_datetime
+from nark.backends.sqlalchemy.objects import AlchemyActivity, AlchemyFact
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import joinedload
+
+__all__ = (
+    "FactNeighbors",
+    "FactsIndex",
+)
+
+
+class FactsIndex(object):
+    """Answers the FactManager time range queries from memory.
+
+    Loads the stored Facts that overlap the window of time from since to until,
+    using one query, and then answers the same questions ``insert_forcefully``
+    asks of ``controller.facts`` -- ``surrounding``, ``starting_at``,
+    ``ending_at``, ``strictly_during``, ``antecedent``, and ``subsequent`` --
+    without going back to the store, so long as the reference time is within
+    the window. Otherwise, or when a Fact outside the window might be the
+    answer, the question is passed along to ``controller.facts``.
+
+    Like the store, each lookup returns new Fact objects, so callers can
+    edit them without affecting the index.
+
+    If neighbors is True, the Fact that ends before the window and the Fact
+    that starts after it are also loaded, so that ``antecedent`` and
+    ``subsequent`` can be answered from memory for any time in the window.
+
+    The index is not updated if the store changes, so use it for one batch
+    of lookups, e.g., to check all the Facts being imported for conflicts.
+    """
+
+    def __init__(self, controller, since, until, neighbors=False):
+        self.controller = controller
+        self.since = self.cmp_time(since)
+        self.until = self.cmp_time(until)
+        self.neighbors = neighbors
+        self.load_facts()
+
+    # ***
+
+    def load_facts(self):
+        query = self.controller.store.session.query(AlchemyFact)
+        # Load each Fact's Activity, Category, and Tags now, rather than
+        # one Fact at a time later, when as_hamster() looks them up.
+        query = query.options(
+            joinedload(AlchemyFact.activity).joinedload(AlchemyActivity.category),
+            joinedload(AlchemyFact.tags),
+        )
+        since = query_prepare_datetime(self.since)
+        until = query_prepare_datetime(self.until)
+        if self.neighbors:
+            since, until = self.widen_window(since, until)
+        condition = and_(
+            AlchemyFact.deleted == False,  # noqa: E712
+            func.datetime(AlchemyFact.start) <= until,
+            or_(
+                AlchemyFact.end == None,  # noqa: E711
+                func.datetime(AlchemyFact.end) >= since,
+            ),
+        )
+        query = query.filter(condition)
+
+        # Order by (start, end, pk), like FactManager.query_order_by_start,
+        # which (like SQLite) sorts NULL before any end time.
+        self.alchemy_facts = sorted(query.all(), key=self.sort_key)
+        # Compare times like the store does, to the second (see func.datetime).
+        self.starts = [self.cmp_time(afact.start) for afact in self.alchemy_facts]
+        self.ends = [
+            self.cmp_time(afact.end) if afact.end is not None else None
+            for afact in self.alchemy_facts
+        ]
+        # For surrounding(), track the latest end time of all Facts up to
+        # each position, so a backwards scan knows when it can stop.
+        self.max_ends = []
+        max_end = None
+        for end in self.ends:
+            if max_end is not datetime.max:
+                max_end = datetime.max if end is None else max(max_end or end, end)
+            self.max_ends.append(max_end)
+        # For ending_at(), the Facts sorted by end time.
+        self.by_end = sorted(
+            (idx for idx, end in enumerate(self.ends) if end is not None),
+            key=lambda idx: (self.ends[idx], idx),
+        )
+        self.by_end_times = [self.ends[idx] for idx in self.by_end]
+
+    def widen_window(self, since, until):
+        # Use subqueries, so the neighbors are loaded by the same query.
+        session = self.controller.store.session
+        ante_end = (
+            session.query(func.max(func.datetime(AlchemyFact.end)))
+            .filter(AlchemyFact.deleted == False)  # noqa: E712
+            .filter(func.datetime(AlchemyFact.end) <= since)
+            .scalar_subquery()
+        )
+        seqt_start = (
+            session.query(func.min(func.datetime(AlchemyFact.start)))
+            .filter(AlchemyFact.deleted == False)  # noqa: E712
+            .filter(func.datetime(AlchemyFact.start) >= until)
+            .scalar_subquery()
+        )
+        return func.coalesce(ante_end, since), func.coalesce(seqt_start, until)
+
+    @staticmethod
+    def sort_key(afact):
+        return (
+            afact.start,
+            afact.end is not None,
+            afact.end or afact.start,
+            afact.pk,
+        )
+
+    @staticmethod
+    def cmp_time(dt):
+        return dt.replace(microsecond=0)
+
+    def in_window(self, ref_time):
+        if not isinstance(ref_time, datetime):
+            return False
+        return self.since <= self.cmp_time(ref_time) <= self.until
+
+    def as_hamster(self, idx):
+        return self.alchemy_facts[idx].as_hamster(self.controller.store)
+
+    def excludes(self, idx, fact):
+        # Like FactManager.query_exclude_fact.
+        return (
+            fact is not None
+            and not fact.unstored
+            and (self.alchemy_facts[idx].pk == fact.pk)
+        )
+
+    # ***
+
+    def surrounding(self, fact_time, inclusive=False):
+        if inclusive or not self.in_window(fact_time):
+            return self.controller.facts.surrounding(fact_time, inclusive=inclusive)
+        fact_time = self.cmp_time(fact_time)
+        found = []
+        idx = bisect_left(self.starts, fact_time) - 1
+        while idx >= 0 and self.max_ends[idx] > fact_time:
+            end = self.ends[idx]
+            if end is None or end > fact_time:
+                found.append(idx)
+            idx -= 1
+        if len(found) > 1:
+            message = 'Broken time frame found at "{}": {} facts found'.format(
+                fact_time, len(found)
+            )
+            raise ValueError(message)
+        return [self.as_hamster(idx) for idx in reversed(found)]
+
+    def starting_at(self, fact):
+        if not self.in_window(fact.start):
+            return self.controller.facts.starting_at(fact)
+        start = self.cmp_time(fact.start)
+        found = [
+            idx
+            for idx in range(
+                bisect_left(self.starts, start), bisect_right(self.starts, start)
+            )
+            if not self.excludes(idx, fact)
+        ]
+        if len(found) > 1:
+            message = (
+                'More than one fact found starting at "{}": {} facts found'.format(
+                    fact.start, len(found)
+                )
+            )
+            raise ValueError(message)
+        return self.as_hamster(found[0]) if found else None
+
+    def ending_at(self, fact):
+        if not self.in_window(fact.end):
+            return self.controller.facts.ending_at(fact)
+        end = self.cmp_time(fact.end)
+        found = [
+            self.by_end[pos]
+            for pos in range(
+                bisect_left(self.by_end_times, end),
+                bisect_right(self.by_end_times, end),
+            )
+            if not self.excludes(self.by_end[pos], fact)
+        ]
+        if len(found) > 1:
+            message = 'More than one fact found ending at "{}": {} facts found'.format(
+                fact.end,
+                len(found),
+            )
+            raise ValueError(message)
+        return self.as_hamster(found[0]) if found else None
+
+    def strictly_during(self, since, until, result_limit=1000):
+        if not self.in_window(since) or not self.in_window(until):
+            return self.controller.facts.strictly_during(
+                since, until, result_limit=result_limit
+            )
+        since = self.cmp_time(since)
+        until = self.cmp_time(until)
+        found = []
+        for idx in range(
+            bisect_left(self.starts, since), bisect_right(self.starts, until)
+        ):
+            end = self.ends[idx]
+            if end is None or end <= until:
+                found.append(self.as_hamster(idx))
+        return found
+
+    # ***
+
+    def antecedent(self, fact=None, ref_time=None):
+        if fact is not None:
+            if fact.end and isinstance(fact.end, datetime):
+                ref_time = fact.end
+            elif fact.start and isinstance(fact.start, datetime):
+                ref_time = fact.start
+        if not self.in_window(ref_time):
+            return self.controller.facts.antecedent(fact=fact, ref_time=ref_time)
+        orig_ref_time = ref_time
+        ref_time = self.cmp_time(ref_time)
+
+        def is_antecedent(idx):
+            start, end = self.starts[idx], self.ends[idx]
+            if end is None:
+                return start < ref_time
+            if end < ref_time:
+                return True
+            if end == ref_time and start < ref_time:
+                return True
+            return (
+                fact is not None
+                and fact.pk is not None
+                and end == ref_time
+                and start == ref_time
+                and self.alchemy_facts[idx].pk < fact.pk
+            )
+
+        # Walk backwards through the Facts that start before ref_time, which
+        # is the same order the store query uses (latest start, end, and PK).
+        idx = bisect_right(self.starts, ref_time) - 1
+        while idx >= 0:
+            if not self.excludes(idx, fact) and is_antecedent(idx):
+                break
+            idx -= 1
+        if idx < 0 or (self.starts[idx] < self.since and not self.neighbors):
+            # A Fact that ends before the window starts might be the antecedent.
+            # (Unless the neighbors were loaded, in which case the Fact before
+            # the window was loaded, and, because stored Facts do not overlap,
+            # any Fact before that one cannot come after the one found.)
+            return self.controller.facts.antecedent(fact=fact, ref_time=orig_ref_time)
+        return self.as_hamster(idx)
+
+    def subsequent(self, fact=None, ref_time=None):
+        if fact is not None:
+            if fact.start and isinstance(fact.start, datetime):
+                ref_time = fact.start
+            elif fact.end and isinstance(fact.end, datetime):
+                ref_time = fact.end
+        if not self.in_window(ref_time):
+            return self.controller.facts.subsequent(fact=fact, ref_time=ref_time)
+        orig_ref_time = ref_time
+        ref_time = self.cmp_time(ref_time)
+
+        def is_subsequent(idx):
+            start, end = self.starts[idx], self.ends[idx]
+            if start > ref_time:
+                return True
+            if end is None:
+                return False
+            if start == ref_time and end > ref_time:
+                return True
+            return (
+                fact is not None
+                and fact.pk is not None
+                and start == ref_time
+                and end == ref_time
+                and self.alchemy_facts[idx].pk > fact.pk
+            )
+
+        idx = bisect_left(self.starts, ref_time)
+        while idx < len(self.starts):
+            if not self.excludes(idx, fact) and is_subsequent(idx):
+                return self.as_hamster(idx)
+            idx += 1
+        # A Fact that starts after the window ends might be the subsequent.
+        return self.controller.facts.subsequent(fact=fact, ref_time=orig_ref_time)
+
+
+class FactNeighbors(object):
+    """Caches the stored Facts around a batch of Facts being edited or imported.
+
+    Call ``prefetch`` with the batch to load the stored Facts within and just
+    around the batch's time range, using one query. The ``antecedent`` and
+    ``subsequent`` lookups (e.g., from ``must_complete_times``) are then
+    answered from memory, as are the other ``FactsIndex`` lookups, via
+    ``facts`` (e.g., for ``insert_forcefully``).
+
+    Call ``invalidate`` when the stored Facts change, e.g., after
+    ``mend_fact_timey_wimey`` mends a Fact (and maybe its neighbors) that
+    the caller will save, and the Facts will be loaded again on the next
+    lookup.
+    """
+
+    def __init__(self, controller):
+        self.controller = controller
+        self.batch = []
+        self.facts_index = None
+
+    def prefetch(self, facts):
+        self.batch = list(facts)
+        self.facts_index = self.index_batch()
+
+    def invalidate(self):
+        self.facts_index = None
+
+    @property
+    def facts(self):
+        if self.facts_index is None:
+            self.facts_index = self.index_batch()
+        if self.facts_index is None:
+            return self.controller.facts
+        return self.facts_index
+
+    def index_batch(self):
+        times = [
+            fact_time
+            for fact in self.batch
+            for fact_time in (fact.start, fact.end)
+            if isinstance(fact_time, datetime)
+        ]
+        if not times:
+            return None
+        return FactsIndex(
+            self.controller, since=min(times), until=max(times), neighbors=True
+        )
+
+    # ***
+
+    def antecedent(self, fact=None, ref_time=None):
+        return self.facts.antecedent(fact=fact, ref_time=ref_time)
+
+    def subsequent(self, fact=None, ref_time=None):
+        return self.facts.subsequent(fact=fact, ref_time=ref_time)
@@ -49,8 +49,10 @@ __all__ = (
     "then_extend_fact",
     "unite_and_stretch",
     # Private:
+    #   '_LaterFacts',
     #   'insert_forcefully',
     #   'resolve_overlapping',
+    #   'resolve_overlapping_bulk',
 )
 
 
@@ -191,7 +193,7 @@ def unite_and_stretch(
 # ***
 
 
-def mend_facts_times(controller, fact, time_hint, skip_store=False):
+def mend_facts_times(controller, fact, time_hint, skip_store=False, facts=None):
     """"""
 
     def _mend_facts_times():
@@ -200,7 +202,9 @@ def mend_facts_times(controller, fact, time_hint, skip_store=False):
         open_start, open_end = new_fact_fill_now(fact, time_hint, controller.now)
         conflicts = []
         if not skip_store:
-            conflicts = insert_forcefully(controller, fact, DEFAULT_SQUASH_SEP)
+            conflicts = insert_forcefully(
+                controller, fact, DEFAULT_SQUASH_SEP, facts=facts
+            )
 
         # Note that end may be None for ongoing Fact.
         # Verify that start > end, if neither are None.
@@ -263,6 +267,49 @@ def mend_facts_times(controller, fact, time_hint, skip_store=False):
 # ***
 
 
+class _LaterFacts(object):
+    """The Facts that follow the Fact whose times are being fixed.
+
+    Each pass over the new Facts walks this list once, calling ``popleft``
+    to move past each Fact, rather than popping the front of a list (which
+    is itself linear). The next known datetime after each position is found
+    by a single reverse scan up front, so ``next_datetime`` does not rescan
+    the remaining Facts. (The Facts after the current one are not changed
+    until the walk reaches them, so the scan stays valid for the pass.)
+    """
+
+    def __init__(self, facts):
+        self.facts = facts
+        self.cursor = 0
+        next_datetimes = [(None, None)] * (len(facts) + 1)
+        for idx in range(len(facts) - 1, -1, -1):
+            fact = facts[idx]
+            if isinstance(fact.start, datetime):
+                next_datetimes[idx] = (fact.start, fact)
+            elif isinstance(fact.end, datetime):
+                next_datetimes[idx] = (fact.end, fact)
+            else:
+                next_datetimes[idx] = next_datetimes[idx + 1]
+        self.next_datetimes = next_datetimes
+
+    def __len__(self):
+        return len(self.facts) - self.cursor
+
+    def __getitem__(self, idx):
+        return self.facts[self.cursor + idx]
+
+    def popleft(self):
+        fact = self.facts[self.cursor]
+        self.cursor += 1
+        return fact
+
+    def next_datetime(self, skip_pk=None):
+        idx = self.cursor
+        if skip_pk and idx < len(self.facts) and self.facts[idx].pk == skip_pk:
+            idx += 1
+        return self.next_datetimes[idx]
+
+
 def must_complete_times(
     controller,
     new_facts,
@@ -270,10 +317,20 @@ def must_complete_times(
     leave_blanks=False,
     other_edits={},
     suppress_barf=False,
+    neighbors=None,
+    ante_fact=None,
+    seqt_fact=None,
 ):
     """
     NOTE: new_facts must be ordered list of facts, or conflicts will happen.
       FIXME: also, write this helpdoc, eh?
+
+    Pass a prefetched ``FactNeighbors`` as neighbors to look up the
+    antecedent and subsequent Facts from memory rather than the store.
+
+    Pass ante_fact and, or, seqt_fact to use those Facts as the Facts before
+    and after new_facts, rather than looking them up, e.g., when new_facts
+    is one window of a larger import.
     """
 
     # ***
@@ -303,11 +360,8 @@ def must_complete_times(
         #      and then calling from_other_edits_maybe,
         #    like we currently do here).
 
-        ante_fact = antecedent_fact(controller.facts, new_facts, controller.now)
-        ante_fact = from_other_edits_maybe(ante_fact)
-
-        seqt_fact = subsequent_fact(controller.facts, new_facts)
-        seqt_fact = from_other_edits_maybe(seqt_fact)
+        ante_fact = fetch_ante_fact()
+        seqt_fact = fetch_seqt_fact()
 
         # Clean up relative clock times first (e.g., given "12:34",
         # assume date is fact's other time's date,
@@ -341,6 +395,20 @@ def must_complete_times(
 
     # ***
 
+    def fetch_ante_fact():
+        if ante_fact is not None:
+            return ante_fact
+        facts_mgr = controller.facts if neighbors is None else neighbors
+        found_fact = antecedent_fact(facts_mgr, new_facts, controller.now)
+        return from_other_edits_maybe(found_fact)
+
+    def fetch_seqt_fact():
+        if seqt_fact is not None:
+            return seqt_fact
+        facts_mgr = controller.facts if neighbors is None else neighbors
+        found_fact = subsequent_fact(facts_mgr, new_facts)
+        return from_other_edits_maybe(found_fact)
+
     def from_other_edits_maybe(fact):
         if fact is None:
             return None
@@ -365,7 +433,7 @@ def must_complete_times(
         def fetch_later_facts():
             later_facts = new_facts[0:]
             if not seqt_fact:
-                return later_facts
+                return _LaterFacts(later_facts)
             if not seqt_fact.start:
                 controller.affirm(False)  # Caught earlier by: backend_integrity().
                 raise Exception(
@@ -373,19 +441,12 @@ def must_complete_times(
                 )
             controller.affirm(isinstance(seqt_fact.start, datetime))
             later_facts += [seqt_fact]
-            return later_facts
+            return _LaterFacts(later_facts)
 
         return _prev_and_later()
 
     def find_next_datetime(later_facts, skip_pk=None):
-        for idx, fact in enumerate(later_facts):
-            if (idx == 0) and skip_pk and skip_pk == fact.pk:
-                continue
-            if isinstance(fact.start, datetime):
-                return fact.start, fact
-            if isinstance(fact.end, datetime):
-                return fact.end, fact
-        return None, None
+        return later_facts.next_datetime(skip_pk)
 
     # ...
 
@@ -401,7 +462,7 @@ def must_complete_times(
         prev_time, later_facts = prev_and_later(new_facts, ante_fact, seqt_fact)
         for fact in new_facts:
             controller.affirm(fact is later_facts[0])
-            later_facts.pop(0)
+            later_facts.popleft()
             prev_time = fix_clock_time_relative(
                 fact, "start", prev_time, later_facts, conflicts
             )
@@ -503,7 +564,7 @@ def must_complete_times(
         prev_time, later_facts = prev_and_later(new_facts, ante_fact, seqt_fact)
         for fact in new_facts:
             controller.affirm(fact is later_facts[0])
-            later_facts.pop(0)
+            later_facts.popleft()
             prev_time = fix_delta_time_relative(
                 fact, "start", prev_time, later_facts, conflicts
             )
@@ -582,7 +643,7 @@ def must_complete_times(
         prev_time, later_facts = prev_and_later(new_facts, ante_fact, seqt_fact)
         for idx, fact in enumerate(new_facts):
             controller.affirm(fact is later_facts[0])
-            later_facts.pop(0)
+            later_facts.popleft()
             controller.affirm(fact.start or fact.end)
             first_fact = idx == 0
             prev_time = fix_blank_time_relative(
@@ -697,7 +758,7 @@ def must_complete_times(
         prev_fact = ante_fact
         for idx, fact in enumerate(new_facts):
             controller.affirm(fact is later_facts[0])
-            later_facts.pop(0)
+            later_facts.popleft()
             n_datetimes = 0
 
             if not fact.start:
@@ -836,7 +897,7 @@ def must_complete_times(
 #   function is only in the context of a single Fact vs. the db.
 
 
-def insert_forcefully(controller, fact, squash_sep=""):
+def insert_forcefully(controller, fact, squash_sep="", facts=None):
     """
     Insert the possibly open-ended Fact into the set of logical
     (chronological) Facts, possibly changing the time frames of,
@@ -846,6 +907,9 @@ def insert_forcefully(controller, fact, squash_sep=""):
         fact (nark.Fact):
             The Fact to insert, with either or both ``start`` and ``end`` set.
 
+        facts (FactsIndex, optional):
+            What to look up the other Facts in. Defaults to ``controller.facts``.
+
     Returns:
         list: List of edited ``Facts``, ordered by ``start``.
 
@@ -1018,7 +1082,10 @@ def insert_forcefully(controller, fact, squash_sep=""):
 
     # ***
 
-    return _insert_forcefully(controller.facts, fact)
+    if facts is None:
+        facts = controller.facts
+
+    return _insert_forcefully(facts, fact)
 
 
 # ***
@@ -1038,7 +1105,7 @@ def resolve_overlapping(fact, conflicts, squash_sep="", allow_momentaneous=False
             if conflict.pk in seen:
                 continue
             seen.add(conflict.pk)
-            original = conflict.copy()
+            original = conflict.snapshot()
             edited_conflicts = resolve_fact_conflict(fact, conflict)
             for edited in edited_conflicts:
                 resolved.append(
@@ -1155,11 +1222,140 @@ def resolve_overlapping(fact, conflicts, squash_sep="", allow_momentaneous=False
     return _resolve_overlapping(fact, conflicts)
 
 
+def resolve_overlapping_bulk(new_facts, stored_facts, allow_momentaneous=False):
+    """
+    Resolve the conflicts between a batch of new Facts and the stored Facts.
+
+    This produces the same timeline as calling ``resolve_overlapping`` for each
+    new Fact in turn (and saving its edits before the next call), but it makes
+    one sweep over both lists, and it copies each stored Fact once at most
+    (plus once for each split), rather than once for each new Fact it overlaps.
+
+    Args:
+        new_facts (list of FactDressed): The new Facts, sorted by ``start``,
+            each with both ``start`` and ``end`` set.
+
+        stored_facts (list of FactDressed): The stored Facts in the batch's
+            time range, sorted by ``start``. They are edited in place.
+
+    Returns:
+        list: (edited, original) tuples, like ``resolve_overlapping``, except
+        that each stored Fact is listed with its final edits only, i.e., an
+        edited or deleted Fact keeps its PK, and each new piece split from it
+        has no PK and has ``split_from`` set to the stored Fact's PK.
+    """
+
+    def _resolve_overlapping_bulk():
+        resolved = []
+        first_idx = 0
+        for stored in stored_facts:
+            assert stored.pk > 0
+            # Skip the new Facts that end before this stored Fact (and
+            # therefore every stored Fact after it) starts.
+            while (
+                first_idx < len(new_facts) and new_facts[first_idx].end < stored.start
+            ):
+                first_idx += 1
+            resolved += resolve_stored_fact(stored, first_idx)
+        return resolved
+
+    def resolve_stored_fact(stored, first_idx):
+        # The original is copied before the first edit. The piece is what remains
+        # of the stored Fact that later new Facts might still overlap.
+        original = None
+        edited = []
+        piece = stored
+        for fact in new_facts[first_idx:]:
+            if piece.end is not None and fact.start > piece.end:
+                # This and all later new Facts start after the piece ends.
+                break
+            if fact.pk is not None and fact.pk == piece.pk:
+                # Editing existing Fact may find itself in db.
+                continue
+            outcome = piece_outcome(fact, piece)
+            if outcome is None:
+                continue
+            if original is None:
+                original = stored.snapshot()
+            if outcome == "split":
+                rpiece = split_piece(fact, piece, stored)
+                edited.append(piece)
+                piece = rpiece
+            elif outcome == "trimmed":
+                trim_piece_start(fact, piece)
+            else:
+                # The piece is deleted, or its end is trimmed, so no later
+                # new Fact, which starts after this one, overlaps it.
+                if outcome == "deleted":
+                    delete_piece(piece)
+                else:
+                    trim_piece_end(fact, piece)
+                edited.append(piece)
+                piece = None
+                break
+        if piece is not None and original is not None:
+            edited.append(piece)
+        return [(edit, original) for edit in edited]
+
+    def piece_outcome(fact, piece):
+        # Same rules as resolve_overlapping's resolve_fact_conflict, but
+        # decides what to do without editing the piece.
+        if fact.start <= piece.start:
+            if fact.end <= piece.start:
+                # Disparate facts.
+                return None
+            if piece.end is not None and fact.end >= piece.end:
+                if (
+                    allow_momentaneous
+                    and (fact.start == piece.start)
+                    and (piece.start == piece.end)
+                ):
+                    # 0-length Fact is not surrounded by new Fact; I'll allow it.
+                    return None
+                return "deleted"
+            return "trimmed"
+        if piece.end is not None and fact.start >= piece.end:
+            # Disparate facts.
+            return None
+        if piece.end is None or fact.end >= piece.end:
+            return "ended"
+        # The new fact is contained *within* the piece!
+        return "split"
+
+    def delete_piece(piece):
+        piece.deleted = True
+        piece.dirty_reasons.add("deleted-starts_before")
+
+    def trim_piece_start(fact, piece):
+        piece.start = fact.end
+        piece.dirty_reasons.add("start")
+
+    def trim_piece_end(fact, piece):
+        if piece.end is None:
+            piece.dirty_reasons.add("stopped")
+        piece.end = fact.start
+        piece.dirty_reasons.add("end")
+
+    def split_piece(fact, piece, stored):
+        rpiece = piece.copy()
+        rpiece.split_from = stored.pk
+        rpiece.pk = None
+        rpiece.start = fact.end
+        rpiece.dirty_reasons.add("rsplit")
+        # Edit the piece in place to become the prior piece.
+        piece.split_from = stored.pk
+        piece.end = fact.start
+        piece.dirty_reasons.add("lsplit")
+        return rpiece
+
+    return _resolve_overlapping_bulk()
+
+
 # ***
 
 
 # MAYBE: Move this fcn. to dob; dob-bright doesn't use it.
-def mend_fact_timey_wimey(controller, fact, time_hint, other_edits={}):
+def mend_fact_timey_wimey(controller, fact, time_hint, other_edits={}, neighbors=None):
     """"""
 
     def _mend_fact_timey_wimey():
@@ -1167,10 +1363,15 @@ def mend_fact_timey_wimey(controller, fact, time_hint, other_edits={}):
         # Fill in the start and, or, end times, maybe.
         # Possibly correct the times of 2 other Facts!
         # Or die if too many Facts are abound tonight.
-        conflicts = mend_facts_times(controller, fact, time_hint)
+        facts = neighbors.facts if neighbors is not None else None
+        conflicts = mend_facts_times(controller, fact, time_hint, facts=facts)
         # Resolve conflicts from store with other edited facts being saved.
         conflicts = rebuild_conflicts(fact, conflicts, other_edits)
         new_fact_or_two = unite_and_stretch_fact_per_conflicts(conflicts)
+        if neighbors is not None and (conflicts or new_fact_or_two):
+            # The caller will save the mended Fact (and any edited neighbors),
+            # which the cached window does not know about yet.
+            neighbors.invalidate()
         return new_fact_or_two, conflicts
 
     def unite_and_stretch_fact_per_conflicts(conflicts):
@@ -1194,6 +1395,7 @@ def mend_fact_timey_wimey(controller, fact, time_hint, other_edits={}):
             new_facts,
             leave_blanks=True,
             other_edits=other_edits,
+            neighbors=neighbors,
         )
         assert len(new_facts) == 1
         fact.end = None if reset_end else fact.end
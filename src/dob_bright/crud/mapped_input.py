@@ -0,0 +1,170 @@
+# This file exists within 'dob-bright':
+#
+#   https://github.com/tallybark/dob-bright
+#
+# Copyright © 2020 Landon Bouma. All rights reserved.
+#
+# This program is free software:  you can redistribute it  and/or  modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any later version  (GPLv3+).
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY;  without even the implied warranty of MERCHANTABILITY or  FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU  General  Public  License  for  more  details.
+#
+# If you lost the GNU General Public License that ships with this software
+# repository (read the 'LICENSE' file), see <http://www.gnu.org/licenses/>.
+
+"""Memory-mapped import file, with lines tracked by their byte offsets."""
+
+import codecs
+import mmap
+import os
+import stat
+
+__all__ = (
+    "MappedInput",
+    "MappedLines",
+)
+
+
+# The encodings whose newlines are always the byte b"\n", so that the file can
+# be split into lines without decoding it. (Not, e.g., UTF-16.)
+# - These are the normalized names, per codecs.lookup().
+NEWLINE_SAFE_ENCODINGS = set(("ascii", "cp1252", "iso8859-1", "utf-8", "utf-8-sig"))
+
+
+class MappedInput(object):
+    """Reads an import file by memory-mapping it.
+
+    Iterating the input yields its lines as strings, like iterating the file
+    would, but the lines are not kept. Instead, the lines of each Fact are
+    tracked by ``MappedLines``, which records where in the file they are, and
+    which decodes them again only when they're read (when the Fact is hydrated).
+
+    Use ``open_maybe`` to map a file, which returns None if the file cannot be
+    mapped (e.g., stdin), or if its lines might differ from what reading the
+    file would give (e.g., if it uses carriage returns, which text mode would
+    translate to newlines).
+
+    Call ``close`` (or use the input as a context manager) once the Facts are
+    hydrated, to unmap the file. (The file itself is left open for the caller.)
+    """
+
+    def __init__(self, mapped, encoding, errors="strict"):
+        self.mapped = mapped
+        self.encoding = encoding
+        self.errors = errors
+
+    @classmethod
+    def open_maybe(cls, file_in):
+        try:
+            fileno = file_in.fileno()
+            encoding = codecs.lookup(file_in.encoding).name
+            if not stat.S_ISREG(os.fstat(fileno).st_mode):
+                return None
+            # Skip mapping (and reading from the start) a file that's been read.
+            if file_in.tell() != 0:
+                return None
+        except (AttributeError, LookupError, OSError, TypeError, ValueError):
+            return None
+
+        if encoding not in NEWLINE_SAFE_ENCODINGS:
+            return None
+
+        try:
+            mapped = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # E.g., "cannot mmap an empty file".
+            return None
+
+        if mapped.find(b"\r") != -1:
+            mapped.close()
+            return None
+
+        return cls(mapped, encoding, file_in.errors or "strict")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def closed(self):
+        return self.mapped.closed
+
+    def close(self):
+        self.mapped.close()
+
+    def __iter__(self):
+        mapped = self.mapped
+        size = len(mapped)
+        start = 0
+        while start < size:
+            end = mapped.find(b"\n", start) + 1 or size
+            yield mapped[start:end].decode(self.encoding, self.errors)
+            start = end
+
+    def decode(self, start, end):
+        return self.mapped[start:end].decode(self.encoding, self.errors)
+
+    def line_end(self, start):
+        return self.mapped.find(b"\n", start) + 1 or len(self.mapped)
+
+    def line_offset(self, line_num):
+        # Returns the offset of the start of the line, counting from 1.
+        start = 0
+        for _ in range(line_num - 1):
+            start = self.line_end(start)
+        return start
+
+    def lines_from(self, line_num, prev_lines=None):
+        """Returns the ``MappedLines`` for the Fact that starts on line_num.
+
+        A Fact's lines run up to the next Fact's lines, so if prev_lines are
+        given, the Fact starts where they end. Otherwise, line_num is found
+        by counting from the start of the file (which is fine for the first
+        Fact, which usually starts on one of the first few lines).
+        """
+        if prev_lines is not None:
+            start = prev_lines.end
+        else:
+            start = self.line_offset(line_num)
+        fact_lines = MappedLines(self, start)
+        fact_lines.append()
+        return fact_lines
+
+
+class MappedLines(object):
+    """The contiguous lines of one Fact in a ``MappedInput``.
+
+    Stands in for the list of lines that ``parse_input`` accumulates for
+    each Fact, but only remembers where the lines start and end.
+    """
+
+    __slots__ = ("mapped_input", "start", "end", "count")
+
+    def __init__(self, mapped_input, start):
+        self.mapped_input = mapped_input
+        self.start = start
+        self.end = start
+        self.count = 0
+
+    def append(self, line=None):
+        # The lines are always appended in order, so the line being
+        # appended is the one that follows the current end.
+        self.end = self.mapped_input.line_end(self.end)
+        self.count += 1
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        text = self.mapped_input.decode(self.start, self.end)
+        lines = text.split("\n")
+        for line in lines[:-1]:
+            yield line + "\n"
+        if lines[-1]:
+            # The final line of the file, without a trailing newline.
+            yield lines[-1]
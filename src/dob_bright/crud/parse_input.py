@@ -18,8 +18,10 @@
 """A time tracker for the command line. Utilizing the power of nark."""
 
 import copy
+import logging
 import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, time, timedelta
 from gettext import gettext as _
 from string import punctuation
@@ -30,6 +32,7 @@ from easy_as_pypi_termio.style import attr, bg, fg
 from nark.helpers.parsing import parse_factoid
 
 from .fact_dressed import FactDressed
+from .facts_index import FactsIndex
 from .fix_times import (
     DEFAULT_SQUASH_SEP,
     mend_facts_times,
@@ -37,25 +40,66 @@ from .fix_times import (
     reduce_time_hint,
     then_extend_fact,
 )
+from .mapped_input import MappedInput
 from .parse_mistakes import prepare_log_msg
 
-__all__ = ("parse_input",)
+__all__ = (
+    "match_time_hint",
+    "parse_input",
+    # Private:
+    #  'RE_MAYBE_META_LINE',
+    #  'RE_TIME_HINT',
+    #  '_dissect_meta_line',
+    #  '_fact_dict_set_time_hint',
+    #  '_line_could_start_fact',
+    #  '_run_parser',
+    #  '_suss_the_time_format',
+)
+
+# MAGIC_NUMBERS: Parsing a meta line takes on the order of a millisecond, so
+# only start a process pool if there are enough lines to make it worthwhile,
+# and send the workers lines in batches, to cut down on pickling overhead.
+PARALLEL_PARSE_MIN_LINES = 200
+PARALLEL_PARSE_CHUNKSIZE = 64
 
 
 # (lb): This fcn. could be moved to dob or dob-bright; only dob uses it.
-def parse_input(controller, file_in=None, progress=None):
+def parse_input(controller, file_in=None, progress=None, jobs=1, window_size=0):
     """
     Import Facts from stdin or a file.
+
+    If ``jobs`` is not 1, the input is read in full, and then the meta lines
+    are parsed in parallel, using that many processes (or one per CPU, if 0).
+
+    If ``window_size`` is set, returns a generator instead, which reads the
+    input as it goes, and yields the new Facts in lists (windows) of about
+    that many Facts each, so that the whole input need not be held in memory.
+    Each window's times are completed and checked against the store before
+    it's yielded, and the caller should save each window before asking for
+    the next, so that the next window is checked against it. (Only the final
+    Fact of the previous window is kept, for context.) The meta lines are
+    parsed serially in this mode (``jobs`` is ignored).
     """
 
+    # Check the log level once, rather than building debug messages for
+    # every line of input that the logger is just going to throw away.
+    log_debug = controller.client_logger.isEnabledFor(logging.DEBUG)
+
     # MAYBE/2018-05-16 00:11: (lb): Parse whole file before prompting.
     #                               Allow --yes to work here, too?
     #                               Not sure...
     #   For now, we'll just read one fact at a time.
 
     def _parse_input():
-        raw_facts = parse_facts_input(file_in)
-        new_facts = must_hydrate_facts(raw_facts)
+        if window_size:
+            return parse_input_windows(file_in)
+        raw_facts, mapped_input = parse_facts_input(file_in)
+        try:
+            new_facts = must_hydrate_facts(raw_facts)
+        finally:
+            # The Facts' lines are decoded from the mapped file when hydrated,
+            # after which the mapping is no longer needed.
+            mapped_input and mapped_input.close()
         conflicts = must_complete_times(controller, new_facts, progress=progress)
         controller.affirm(not conflicts)  # (lb): 2019-01-19: This happen?
         repair_shoulder_fact_times(new_facts, raw_facts)
@@ -77,8 +121,15 @@ def parse_input(controller, file_in=None, progress=None):
         #   filename convention does in *nix -- but I thought I'm spell
         #   it out, in case it feels odd to new developers.
         input_f = file_or_stdin(file_in)
-        raw_facts = parse_facts_from_stream(input_f)
-        return raw_facts
+        return parse_facts_from_stream(input_f)
+
+    def map_input_maybe(input_f):
+        # If the input is a file, map it, and keep track of each Fact's lines
+        # by their offsets in the file, rather than holding them in memory.
+        mapped_input = MappedInput.open_maybe(input_f)
+        if mapped_input is None:
+            return input_f, None
+        return mapped_input, mapped_input
 
     def file_or_stdin(file_in):
         if file_in is not None:
@@ -86,110 +137,170 @@ def parse_input(controller, file_in=None, progress=None):
         return sys.stdin
 
     def parse_facts_from_stream(input_f):
+        progress and progress.click_echo_current_task(_("Parsing factoids..."))
+        input_f, mapped_input = map_input_maybe(input_f)
+        try:
+            classified_lines = classify_factoid_lines(input_f)
+            dissected = None
+            if jobs != 1:
+                classified_lines = list(classified_lines)
+                dissected = dissect_meta_lines_parallel(classified_lines)
+            raw_facts = list(
+                assemble_factoids(classified_lines, dissected, mapped_input)
+            )
+        except BaseException:
+            mapped_input and mapped_input.close()
+            raise
+        return raw_facts, mapped_input
+
+    def classify_factoid_lines(input_f):
+        # Split the input into lines that might start a new Fact, and lines that
+        # continue the current Fact's description. This does not depend on the
+        # results of parsing meta lines, so it can run ahead of the parser.
+        # - Yields (line_num, line, maybe_meta) tuples.
+
         # Track current empty line run count, to know when to check if line
         # starts a new Fact. Keep at -1 until we've seen the first fact.
         bl_count = -1
 
         line_num = 0
-
-        # Coalesce each Fact, line by line.
-        current_fact_dict = None
-        accumulated_fact = []
-        unprocessed_facts = []
-
-        progress and progress.click_echo_current_task(_("Parsing factoids..."))
         for line in input_f:
             line_num += 1
             (
                 bl_count,
                 processed,
-            ) = gobble_blank_or_continued(line, accumulated_fact, bl_count)
+            ) = gobble_blank_or_continued(line, bl_count)
             if processed:
+                if bl_count >= 0:
+                    yield line_num, line, False
+                # else, a blank line before the first Fact.
+                continue
+            yield line_num, line, True
+            bl_count = 0
+
+    def assemble_factoids(classified_lines, dissected=None, mapped_input=None):
+        # Coalesce each Fact, line by line.
+        # - Yields (fact_dict, accumulated_fact) tuples, as each Fact completes.
+        # - If the input is mapped, accumulated_fact is a MappedLines, which
+        #   tracks the lines' offsets, and which decodes them when iterated.
+        current_fact_dict = None
+        accumulated_fact = []
+
+        for line_num, line, maybe_meta in classified_lines:
+            if not maybe_meta:
+                accumulated_fact.append(line)
                 continue
-            fact_dict = gobble_if_not_new_fact(line, accumulated_fact, bl_count)
+            fact_dict = gobble_if_not_new_fact(
+                line, accumulated_fact, dissected and dissected.get(line_num)
+            )
             if fact_dict is None:
-                bl_count = 0
                 continue
             fact_dict["parsed_source.line_num"] = line_num
-            fact_dict["parsed_source.line_raw"] = line
+            # (The line_raw is set on hydrate, from the accumulated lines.)
             if not accumulated_fact:
                 # First Fact.
                 assert current_fact_dict is None
-                assert not accumulated_fact
                 current_fact_dict = fact_dict
-                accumulated_fact.append(line)
-                bl_count = 0
+                accumulated_fact = start_fact_lines(line_num, line, mapped_input)
                 continue
             else:
                 assert current_fact_dict is not None
-                assert accumulated_fact
 
             # Woot, woot! We parsed a complete Fact.
             if current_fact_dict:
-                unprocessed_facts.append(
-                    (
-                        current_fact_dict,
-                        accumulated_fact,
-                    )
+                yield (
+                    current_fact_dict,
+                    accumulated_fact,
                 )
             current_fact_dict = fact_dict
-            accumulated_fact = [
-                line,
-            ]
-            bl_count = 0
+            accumulated_fact = start_fact_lines(
+                line_num, line, mapped_input, accumulated_fact
+            )
 
         # end: for
 
         if accumulated_fact:
-            unprocessed_facts.append(
-                (
-                    current_fact_dict,
-                    accumulated_fact,
-                )
+            yield (
+                current_fact_dict,
+                accumulated_fact,
             )
         else:
             msg = _("What is this, an empty file?")
             exit_warning_crude(msg)
 
-        return unprocessed_facts
+    def start_fact_lines(line_num, line, mapped_input, prev_lines=None):
+        if mapped_input is None:
+            return [
+                line,
+            ]
+        return mapped_input.lines_from(line_num, prev_lines)
+
+    def dissect_meta_lines_parallel(classified_lines):
+        # Parse the meta line candidates in a pool of processes. The results
+        # come back in the same order the lines were sent, and assemble_factoids
+        # looks them up by line number, so the Facts are assembled exactly as
+        # if the lines had been parsed one at a time.
+        meta_lines = [
+            (line_num, line)
+            for line_num, line, maybe_meta in classified_lines
+            if maybe_meta and line_might_be_meta(line)
+        ]
+        if len(meta_lines) < PARALLEL_PARSE_MIN_LINES:
+            # Not worth the overhead of starting the pool.
+            return None
+
+        max_workers = jobs or None
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(
+                _dissect_meta_line,
+                [line for line_num, line in meta_lines],
+                chunksize=PARALLEL_PARSE_CHUNKSIZE,
+            )
+            dissected = {
+                line_num: result
+                for (line_num, line), result in zip(meta_lines, results)
+            }
+        return dissected
 
-    def gobble_blank_or_continued(line, accumulated_fact, blank_line_count):
+    def gobble_blank_or_continued(line, blank_line_count):
         processed = False
         if blank_line_count < 0:
             # Start of file.
             assert blank_line_count == -1
             if not line.strip():
-                controller.client_logger.debug(_("Skip premature blank line"))
+                log_debug and controller.client_logger.debug(
+                    _("Skip premature blank line")
+                )
                 # Skip blank lines pre-Facts.
                 processed = True
             # else, we found the first non-blank line. We now
             #   expect to find the date:time & meta, or death.
         elif not line.strip():  # remove trailing newline
-            controller.client_logger.debug(_("- Blank line in desc."))
-            accumulated_fact.append(line)
+            log_debug and controller.client_logger.debug(_("- Blank line in desc."))
             blank_line_count += 1
             processed = True
         elif blank_line_count == 0:
-            controller.client_logger.debug(_("- Part of desc.:\n") + line.strip())
-            accumulated_fact.append(line)
+            log_debug and controller.client_logger.debug(
+                _("- Part of desc.:\n") + line.strip()
+            )
             processed = True
         elif re.match(r"^\s", line):
-            controller.client_logger.debug(_("- Leading whitesp.:\n") + line.strip())
-            accumulated_fact.append(line)
+            log_debug and controller.client_logger.debug(
+                _("- Leading whitesp.:\n") + line.strip()
+            )
             processed = True
         # else, any content that follows blank line(s) is either:
         # (1) more content; (2) a new Fact; or (3) Fact separator.
         return (blank_line_count, processed)
 
-    def gobble_if_not_new_fact(line, accumulated_fact, blank_line_count):
+    def gobble_if_not_new_fact(line, accumulated_fact, dissected=None):
         fact_dict = None
-        if not line_starts_with_punctuation(line):
-            fact_dict = dissect_meta_line(line)
+        if line_might_be_meta(line):
+            fact_dict = dissect_meta_line(line, dissected)
         must_not_be_unparseable_first_line(
             fact_dict,
             line,
             accumulated_fact,
-            blank_line_count,
         )
         return fact_dict
 
@@ -212,23 +323,32 @@ def parse_input(controller, file_in=None, progress=None):
         # MAYBE/2021-02-07: Also reject lines that start with whitespace?
         return RE_LEADS_WITH_PUNCTUATION.match(line) is not None
 
+    def line_might_be_meta(line):
+        if line_starts_with_punctuation(line):
+            return False
+        if not _line_could_start_fact(line):
+            log_debug and controller.client_logger.debug(
+                _("- Not meta: ") + line.strip()
+            )
+            return False
+        return True
+
     def must_not_be_unparseable_first_line(
         fact_dict,
         line,
         accumulated_fact,
-        blank_line_count,
     ):
         if fact_dict is not None:
             return
 
         # If not parsed, and first line we've seen, die.
-        missing_fact_must_come_early(line, blank_line_count)
+        missing_fact_must_come_early(line, accumulated_fact)
         # else, more content, or a Fact separator.
-        controller.client_logger.debug(_("- More desc.: ") + line.strip())
+        log_debug and controller.client_logger.debug(_("- More desc.: ") + line.strip())
         accumulated_fact.append(line)
 
-    def missing_fact_must_come_early(line, blank_line_count):
-        if blank_line_count == -1:
+    def missing_fact_must_come_early(line, accumulated_fact):
+        if not accumulated_fact:
             msg = "{}: {}{}{}{}{}\n".format(
                 _("The first nonempty line is not a recognized Fact."),
                 bg("white"),
@@ -239,97 +359,20 @@ def parse_input(controller, file_in=None, progress=None):
             )
             exit_warning_crude(msg)
 
-    # FIXME/2019-01-21: Document all the different usage, both in test, and README.
-    # E.g., "then: I did this" should be same as "at +0: I did this"
-    #   but if you specify start you don't need colon
-    #       "then 2019-01-21 23:47 I did this" should also work...
-    #   FIXME: Parse "then" expecting 1+ datetimes, or "then:" expecting none.
-    #   FIXME: Parse "still" expecting 1+ datetimes, or "still:" expecting none.
-    # FIXME: Three tests:
-    #           ``still <time-spec> <desc>``
-    #       vs. ``still: <desc>``
-    #       vs. ``still blah``
-    RE_TIME_HINT = re.compile(
-        # SYNC_ME: RE_TIME_HINT, TIME_HINT_MAP, and @generate_add_fact_command's.
-        r"^("
-        # Skipping: Doesn't make sense: '(?P<verify_none>on|now)'
-        # MAYBE/2019-01-22: Is "between" okay here?
-        #   We don't have a Click alias for it, so
-        #   there's a `dob from` command, but not `dob between`,
-        #   so maybe we want to remove "between" from here.
-        # FIXME/2021-02-07: i18n/l10n this.
-        "(?P<verify_both>from|between)"
-        "|(?P<verify_start>at)"  # noqa: E131
-        "|(?P<verify_end>to|until)"
-        "|(?P<verify_then_none>then:)"
-        "|(?P<verify_then_some>then)"
-        "|(?P<verify_still_none>still:)"
-        "|(?P<verify_still_some>still)"
-        # NOTE: Require colon postfix for options w/o time component.
-        # NOTE: 'now' would be confusing and conflict with other usage,
-        #       (at least I think it would?). E.g., do not do this:
-        #         '|(?P<verify_after>after:|since:|next:|now:)'
-        "|(?P<verify_after>after:|since:|next:)"
-        " )",  # NOTE The SPACE CHARACTER following THE DIRECTIVE!
-        re.IGNORECASE,
-    )
-
-    def dissect_meta_line(line):
-        sussed_hint, time_hint, line = suss_the_time_format(line)
-        fact_dict, err = run_parser(line, time_hint)
+    def dissect_meta_line(line, dissected=None):
+        if dissected is None:
+            dissected = _dissect_meta_line(line)
+        fact_dict, err, time_hint, sussed_hint = dissected
         if not fact_dict["start"] and not fact_dict["end"]:
-            controller.client_logger.debug(_("unmeta: {}".format(err)))
             fact_dict = None
-        else:
-            # The user could specify, e.g., just a single datetime (followed
-            # by a description), and we can fill in the other datetime and
-            # ask the user for more details about the fact.
-            #   Not always True:  assert not err
-            controller.client_logger.debug(
-                _(
-                    # Including the description is too verbose:
-                    #   'new fact_dict: {}'.format(fact_dict)
-                    # so let's make a complicated dictionary comprehension instead.
-                    "new fact_dict: {}".format(
-                        {
-                            key: val
-                            if key != "description"
-                            else val[:10] + ((len(val) > 10) and "..." or "")
-                            for key, val in fact_dict.items()
-                        }
-                    )
-                )
-            )
+        # else, the user could specify, e.g., just a single datetime (followed
+        # by a description), and we can fill in the other datetime and ask the
+        # user for more details about the fact.
+        #   Not always True:  assert not err
+        log_debug and log_dissected_meta_line(fact_dict, err, time_hint, sussed_hint)
         return fact_dict
 
-    # 2021-02-08: This function had been defaulting `time_hint` to 'verify_start',
-    # but the new 'verify_unset' now lets parsing.py know whether this higher-up
-    # parser found an 'at' or 'to' preceding the datetime, which would indicate
-    # higher confidence that the beginning of the input line is meant to be the
-    # start time. That is, differentiating 'verify_start' with 'verify_unset'
-    # allows the lower level parser to be a little more strict on the input, and
-    # to not assume so easily-quickly that a potential datetime input is valid.
-    # - Currently, this new feature is only used to reject a line that starts with
-    #   a bare number but otherwise has no indication the user means for the number
-    #   to be the start time.
-    #   - E.g., '123 friends showed up' does not contain a start time, whereas
-    #     'at 1:23: friends showed up' definitely indicates a start time.
-    #   - But without the 'at' or the ':' after the time, it's a wee more ambiguous.
-    #     E.g., '1:23 friends showed up' or '123: friends showed up' are not as
-    #     obvious as 'at 1:23: friends showed up'. But they still seem like start
-    #     times, and not part of a description, unlike '123 friends showed up'.
-    def suss_the_time_format(line):
-        sussed_hint = ""
-        match = RE_TIME_HINT.match(line)
-        if match is not None:
-            for hint, matched in match.groupdict().items():
-                if matched is not None:
-                    assert not sussed_hint
-                    sussed_hint = hint
-                    # Remove the time hint prefix.
-                    line = RE_TIME_HINT.sub("", line).lstrip()
-        # 2021-02-08: See comment above describing newly added 'verify_unset'.
-        time_hint = sussed_hint or "verify_unset"
+    def log_dissected_meta_line(fact_dict, err, time_hint, sussed_hint):
         controller.client_logger.debug(
             _(
                 "time_hint: {}{}".format(
@@ -338,44 +381,27 @@ def parse_input(controller, file_in=None, progress=None):
                 )
             )
         )
-        return sussed_hint, time_hint, line
-
-    def run_parser(line, time_hint):
-        # Parse the line as if it were a new fact. And don't strip the line.
-        # Parser expects metadata to be separated from description (so leave
-        # the newline). And we can be strict and require that the date data
-        # starts the line.
-
-        # Per dob-insert commands, parser expects iterable.
-        factoid = (line,)
-
-        use_hint = reduce_time_hint(time_hint)
-
-        fact_dict, err = parse_factoid(
-            factoid=factoid,
-            time_hint=use_hint,
-            # MEH: (lb): Should we leave hash_stamps='#@' ?
-            #   I sorta like using the proper tag symbol
-            #   when not worried about shell interpolation.
-            hash_stamps="#",
-            # Set lenient=True to handle errors ourselves, later, in bulk,
-            # either `--ask`'ing the user for more Fact details or puking
-            # all the errors and exiting.
-            lenient=True,
+        if fact_dict is None:
+            controller.client_logger.debug(_("unmeta: {}".format(err)))
+            return
+        controller.client_logger.debug(
+            _(
+                # Including the description is too verbose:
+                #   'new fact_dict: {}'.format(fact_dict)
+                # so let's make a complicated dictionary comprehension instead.
+                "new fact_dict: {}".format(
+                    {
+                        key: (
+                            val
+                            if key != "description"
+                            else val[:10] + ((len(val) > 10) and "..." or "")
+                        )
+                        for key, val in fact_dict.items()
+                    }
+                )
+            )
         )
 
-        fact_dict_set_time_hint(fact_dict, time_hint)
-
-        return fact_dict, err
-
-    # FIXME/DRY: See create.py/transcode.py (places that use "+0").
-    def fact_dict_set_time_hint(fact_dict, time_hint):
-        fact_dict["time_hint"] = time_hint
-        if time_hint in ("verify_after", "verify_then_none", "verify_still_none"):
-            assert not fact_dict["start"] and not fact_dict["end"]
-            # (lb): How's this for a hack!?
-            fact_dict["start"] = "+0"
-
     # ***
 
     def must_hydrate_facts(raw_facts):
@@ -389,18 +415,27 @@ def parse_input(controller, file_in=None, progress=None):
         temp_id = -1
         progress and progress.click_echo_current_task(_("Hydrating Facts..."))
         for fact_dict, accumulated_fact in raw_facts:
-            add_hydration_warnings(fact_dict, hydrate_errs)
-            hydrate_description(fact_dict, accumulated_fact)
-            new_fact, err_msg = create_fact_from_parsed_dict(fact_dict)
-            if new_fact:
-                assert not err_msg
-                time_hint = fact_dict["time_hint"]
-                temp_id = add_new_fact(new_fact, time_hint, temp_id, new_facts)
-            else:
-                assert not new_fact
-                hydrate_errs.append(err_msg)
+            temp_id = hydrate_fact(
+                fact_dict, accumulated_fact, temp_id, new_facts, hydrate_errs
+            )
         return new_facts, hydrate_errs
 
+    def hydrate_fact(fact_dict, accumulated_fact, temp_id, new_facts, hydrate_errs):
+        # Decode the lines, if mapped; otherwise, copy the list.
+        fact_lines = list(accumulated_fact)
+        fact_dict["parsed_source.line_raw"] = fact_lines[0]
+        add_hydration_warnings(fact_dict, hydrate_errs)
+        hydrate_description(fact_dict, fact_lines)
+        new_fact, err_msg = create_fact_from_parsed_dict(fact_dict)
+        if new_fact:
+            assert not err_msg
+            time_hint = fact_dict["time_hint"]
+            temp_id = add_new_fact(new_fact, time_hint, temp_id, new_facts)
+        else:
+            assert not new_fact
+            hydrate_errs.append(err_msg)
+        return temp_id
+
     def add_hydration_warnings(fact_dict, hydrate_errs):
         if not fact_dict["warnings"]:
             return
@@ -586,7 +621,10 @@ def parse_input(controller, file_in=None, progress=None):
         #     unite_and_stretch, insert_forcefully, and resolve_overlapping.
         # (lb): Maybe someday we can combine this code better. The way different
         #   features were grown, however, resulted in squash code in a few places.
+        repair_first_fact_start(new_facts, raw_facts[0][0]["start"])
+        repair_final_fact_end(new_facts, raw_facts[-1][0]["end"])
 
+    def repair_first_fact_start(new_facts, raw_start):
         if not new_facts[0].start:
             # User did not specify first fact's start, and we did not find
             # an antecedent fact in the data store, so, what? Set earliest
@@ -594,15 +632,103 @@ def parse_input(controller, file_in=None, progress=None):
             new_facts[0].start = datetime.combine(new_facts[0].end, time.min)
             if new_facts[0].start == new_facts[0].end:
                 new_facts[0].start = new_facts[0].end - timedelta(days=1)
-        elif not raw_facts[0][0]["start"]:
+        elif not raw_start:
             new_facts[0].start = None
 
+    def repair_final_fact_end(new_facts, raw_end):
         controller.affirm(new_facts[-1].end)
-        if not raw_facts[-1][0]["end"]:
+        if not raw_end:
             new_facts[-1].end = None
 
     # ***
 
+    def parse_input_windows(file_in):
+        input_f = file_or_stdin(file_in)
+        progress and progress.click_echo_current_task(_("Parsing factoids..."))
+        input_f, mapped_input = map_input_maybe(input_f)
+        try:
+            yield from parse_mapped_windows(input_f, mapped_input)
+        finally:
+            # Unmap the file once the final window is yielded (or if the caller
+            # gives up early, and closes the generator).
+            mapped_input and mapped_input.close()
+
+    def parse_mapped_windows(input_f, mapped_input):
+        raw_facts = assemble_factoids(
+            classify_factoid_lines(input_f), mapped_input=mapped_input
+        )
+
+        # The Facts not yet yielded, and the final Fact that was.
+        window = []
+        ante_fact = None
+        hydrate_errs = []
+        temp_id = -1
+        raw_start = None
+        raw_end = None
+        for idx, (fact_dict, accumulated_fact) in enumerate(raw_facts):
+            if idx == 0:
+                raw_start = fact_dict["start"]
+            raw_end = fact_dict["end"]
+            temp_id = hydrate_fact(
+                fact_dict, accumulated_fact, temp_id, window, hydrate_errs
+            )
+            if len(window) < window_size:
+                continue
+            split_at = find_window_split(window, ante_fact)
+            if not split_at:
+                continue
+            must_hydrated_all_facts(hydrate_errs)
+            new_facts, window = window[:split_at], window[split_at:]
+            complete_window(new_facts, ante_fact, window[0], raw_start, None)
+            if new_facts:
+                yield new_facts
+                ante_fact = new_facts[-1]
+
+        must_hydrated_all_facts(hydrate_errs)
+        complete_window(window, ante_fact, None, raw_start, raw_end)
+        yield window
+
+    def find_window_split(window, ante_fact):
+        # Split the window before the last Fact that starts at a known
+        # datetime. Because must_complete_times works forward from the
+        # previous known datetime, and backward from the next one, the
+        # Facts before the split do not depend on the Facts after it.
+        # - And the Facts after the split might still be squashed into,
+        #   or extended, by the next Fact read, so they'll wait.
+        for split_at in range(len(window) - 1, 0, -1):
+            if isinstance(window[split_at].start, datetime):
+                break
+        else:
+            return None
+        if ante_fact is None and not any(
+            isinstance(fact.start, datetime) or isinstance(fact.end, datetime)
+            for fact in window[:split_at]
+        ):
+            # The first window must include a known datetime, which
+            # must_complete_times uses to find the antecedent in the store.
+            return None
+        return split_at
+
+    def complete_window(new_facts, ante_fact, seqt_fact, raw_start, raw_end):
+        conflicts = must_complete_times(
+            controller,
+            new_facts,
+            progress=progress,
+            ante_fact=ante_fact,
+            seqt_fact=seqt_fact,
+        )
+        controller.affirm(not conflicts)
+        if not new_facts:
+            # All of them culled (momentaneous).
+            return
+        if ante_fact is None:
+            repair_first_fact_start(new_facts, raw_start)
+        if seqt_fact is None:
+            repair_final_fact_end(new_facts, raw_end)
+        must_not_conflict_existing(new_facts)
+
+    # ***
+
     def must_not_conflict_existing(new_facts):
         # (lb): Yuck. Sorry about this. Totally polluting what was a small
         # function with lots of progress-output overhead.
@@ -613,6 +739,9 @@ def parse_input(controller, file_in=None, progress=None):
             )
 
         could_be_more = fix_range_conflicts_easy(new_facts)
+        # If so, load the stored Facts in the import's time range just once,
+        # rather than querying the store a few times for each imported Fact.
+        facts_index = could_be_more and index_facts_in_range(new_facts) or None
 
         all_conflicts = []
         for idx, fact in enumerate(new_facts):
@@ -636,6 +765,7 @@ def parse_input(controller, file_in=None, progress=None):
                 fact,
                 time_hint=time_hint,
                 skip_store=not could_be_more,
+                facts=facts_index,
             )
             assert not fact.deleted  # Only on squash, which shouldn't happen.
 
@@ -654,6 +784,11 @@ def parse_input(controller, file_in=None, progress=None):
         # resolution application!
         barf_on_overlapping_facts_old(all_conflicts)
 
+    def index_facts_in_range(new_facts):
+        first_time = new_facts[0].start or new_facts[0].end
+        final_time = new_facts[-1].end or new_facts[-1].start
+        return FactsIndex(controller, since=first_time, until=final_time)
+
     def fix_range_conflicts_easy(new_facts):
         """
         Check time range of facts being imported against store.
@@ -774,3 +909,149 @@ def parse_input(controller, file_in=None, progress=None):
     # ***
 
     return _parse_input()
+
+
+# ***
+
+# FIXME/2019-01-21: Document all the different usage, both in test, and README.
+# E.g., "then: I did this" should be same as "at +0: I did this"
+#   but if you specify start you don't need colon
+#       "then 2019-01-21 23:47 I did this" should also work...
+#   FIXME: Parse "then" expecting 1+ datetimes, or "then:" expecting none.
+#   FIXME: Parse "still" expecting 1+ datetimes, or "still:" expecting none.
+# FIXME: Three tests:
+#           ``still <time-spec> <desc>``
+#       vs. ``still: <desc>``
+#       vs. ``still blah``
+RE_TIME_HINT = re.compile(
+    # SYNC_ME: RE_TIME_HINT, TIME_HINT_MAP, and @generate_add_fact_command's.
+    # - Note the non-capturing outer group, so that match.lastgroup is the
+    #   name of the time hint that matched (see match_time_hint).
+    r"^(?:"
+    # Skipping: Doesn't make sense: '(?P<verify_none>on|now)'
+    # MAYBE/2019-01-22: Is "between" okay here?
+    #   We don't have a Click alias for it, so
+    #   there's a `dob from` command, but not `dob between`,
+    #   so maybe we want to remove "between" from here.
+    # FIXME/2021-02-07: i18n/l10n this.
+    "(?P<verify_both>from|between)"
+    "|(?P<verify_start>at)"  # noqa: E131
+    "|(?P<verify_end>to|until)"
+    "|(?P<verify_then_none>then:)"
+    "|(?P<verify_then_some>then)"
+    "|(?P<verify_still_none>still:)"
+    "|(?P<verify_still_some>still)"
+    # NOTE: Require colon postfix for options w/o time component.
+    # NOTE: 'now' would be confusing and conflict with other usage,
+    #       (at least I think it would?). E.g., do not do this:
+    #         '|(?P<verify_after>after:|since:|next:|now:)'
+    "|(?P<verify_after>after:|since:|next:)"
+    " )",  # NOTE The SPACE CHARACTER following THE DIRECTIVE!
+    re.IGNORECASE,
+)
+
+
+# The parser only finds datetimes at the start of the line, and all the
+# datetimes it knows -- ISO 8601, clock times, and relative times -- start
+# with a digit, or with a '+' or '-'. Otherwise, the parser looks for the
+# '@' actegory separator, and tries to parse the friendly datetime that
+# precedes it, e.g., 'yesterday at 3 PM, act@cat'. Lines that match none
+# of these -- nor start with a time hint -- cannot start a Fact, so skip
+# the (relatively expensive) parser, e.g., for description paragraphs.
+RE_MAYBE_META_LINE = re.compile(r"^\s*[-+\d]|@")
+
+
+def match_time_hint(line):
+    """Returns the time hint that starts the line, and where the hint ends.
+
+    The time hint is the name of the ``RE_TIME_HINT`` group that matched,
+    e.g., ``'verify_start'`` for a line that starts ``'at '``. If the line
+    does not start with a time hint, returns ``('', 0)``.
+
+    The line is scanned just once, and the caller can slice the remainder
+    from the offset, e.g., ``line[hint_end:]``.
+    """
+    match = RE_TIME_HINT.match(line)
+    if match is None:
+        return "", 0
+    return match.lastgroup, match.end()
+
+
+def _line_could_start_fact(line):
+    return (
+        RE_MAYBE_META_LINE.search(line) is not None
+        or RE_TIME_HINT.match(line) is not None
+    )
+
+
+def _dissect_meta_line(line):
+    # This fcn. runs in a worker process when parsing in parallel, so
+    # it cannot log. The caller logs the results, via dissect_meta_line.
+    # - Returns a (fact_dict, err, time_hint, sussed_hint) tuple.
+    sussed_hint, time_hint, line = _suss_the_time_format(line)
+    fact_dict, err = _run_parser(line, time_hint)
+    return fact_dict, err, time_hint, sussed_hint
+
+
+# 2021-02-08: This function had been defaulting `time_hint` to 'verify_start',
+# but the new 'verify_unset' now lets parsing.py know whether this higher-up
+# parser found an 'at' or 'to' preceding the datetime, which would indicate
+# higher confidence that the beginning of the input line is meant to be the
+# start time. That is, differentiating 'verify_start' with 'verify_unset'
+# allows the lower level parser to be a little more strict on the input, and
+# to not assume so easily-quickly that a potential datetime input is valid.
+# - Currently, this new feature is only used to reject a line that starts with
+#   a bare number but otherwise has no indication the user means for the number
+#   to be the start time.
+#   - E.g., '123 friends showed up' does not contain a start time, whereas
+#     'at 1:23: friends showed up' definitely indicates a start time.
+#   - But without the 'at' or the ':' after the time, it's a wee more ambiguous.
+#     E.g., '1:23 friends showed up' or '123: friends showed up' are not as
+#     obvious as 'at 1:23: friends showed up'. But they still seem like start
+#     times, and not part of a description, unlike '123 friends showed up'.
+def _suss_the_time_format(line):
+    sussed_hint, hint_end = match_time_hint(line)
+    if sussed_hint:
+        # Remove the time hint prefix.
+        line = line[hint_end:].lstrip()
+    # 2021-02-08: See comment above describing newly added 'verify_unset'.
+    time_hint = sussed_hint or "verify_unset"
+    return sussed_hint, time_hint, line
+
+
+def _run_parser(line, time_hint):
+    # Parse the line as if it were a new fact. And don't strip the line.
+    # Parser expects metadata to be separated from description (so leave
+    # the newline). And we can be strict and require that the date data
+    # starts the line.
+
+    # Per dob-insert commands, parser expects iterable.
+    factoid = (line,)
+
+    use_hint = reduce_time_hint(time_hint)
+
+    fact_dict, err = parse_factoid(
+        factoid=factoid,
+        time_hint=use_hint,
+        # MEH: (lb): Should we leave hash_stamps='#@' ?
+        #   I sorta like using the proper tag symbol
+        #   when not worried about shell interpolation.
+        hash_stamps="#",
+        # Set lenient=True to handle errors ourselves, later, in bulk,
+        # either `--ask`'ing the user for more Fact details or puking
+        # all the errors and exiting.
+        lenient=True,
+    )
+
+    _fact_dict_set_time_hint(fact_dict, time_hint)
+
+    return fact_dict, err
+
+
+# FIXME/DRY: See create.py/transcode.py (places that use "+0").
+def _fact_dict_set_time_hint(fact_dict, time_hint):
+    fact_dict["time_hint"] = time_hint
+    if time_hint in ("verify_after", "verify_then_none", "verify_still_none"):
+        assert not fact_dict["start"] and not fact_dict["end"]
+        # (lb): How's this for a hack!?
+        fact_dict["start"] = "+0"
@@ -33,6 +33,15 @@ class JournalWriter(LineWriter):
     def requires_table(self):
         return True
 
+    @property
+    def streams_rows(self):
+        return True
+
+    @property
+    def width_columns(self):
+        # Only the first column is padded (see _write_result).
+        return [0]
+
     def write_report(self, table, headers, tabulation=None):
         self.curr_section = None
         return super(JournalWriter, self).write_report(table, headers, tabulation)
@@ -29,6 +29,7 @@ from nark.reports.xml_writer import XMLWriter
 
 from .factoid_writer import FactoidWriter
 from .journal_writer import JournalWriter
+from .report_cache import DailyTotalsCache
 from .table_writer import TableWriter
 from .tabulate_results import tabulate_results
 
@@ -59,17 +60,33 @@ def render_results(
     hide_totals=False,
     re_sort=False,
 ):
-    """"""
+    """Renders the results, or queries them first, if ``results`` is None.
+
+    When the caller does not pass the ``results``, they are fetched per the
+    ``query_terms``. A daily report is assembled from the per-day totals
+    cache (``DailyTotalsCache``) when it can be, otherwise the results are
+    fetched from the store.
+    """
 
     def _render_results():
+        report_results = gather_results()
         # Send output to the path or object indicated, or stdout or pager.
         output_obj = output_obj_or_path or ClickEchoPager
         writer = fetch_report_writer(output_format, output_obj)
-        n_written = prepare_and_render_results(writer)
+        n_written = prepare_and_render_results(writer, report_results)
         return n_written
 
     # ***
 
+    def gather_results():
+        if results is not None:
+            return results
+        # The cache falls back on get_all for the queries it cannot answer.
+        report_cache = DailyTotalsCache(controller)
+        return report_cache.gather_results(query_terms)
+
+    # ***
+
     def fetch_report_writer(output_format, output_obj):
         writer = fetch_report_writer_cls(
             output_format=output_format,
@@ -143,13 +160,20 @@ def render_results(
 
     # ***
 
-    def prepare_and_render_results(writer):
+    def prepare_and_render_results(writer, results):
         if headers is not None:
             # For list/usage act/cat/tag, already have ready table and headers.
             n_written = writer.write_report(results, headers, tabulation=None)
         elif query_terms.include_stats or writer.requires_table:
             # For reports with stats, post-process results; possibly sort.
-            tabulation = prepare_table_and_columns()
+            # - If the writer consumes one row at a time, tabulate_results
+            #   can generate each row on demand (unless the report needs
+            #   to see all the rows first, e.g., to make sparklines).
+            tabulation = prepare_table_and_columns(
+                results,
+                track_widths=writer_width_columns(writer),
+                streaming=writer_streams_rows(writer),
+            )
             tabn_headers = [repcol.header for repcol in tabulation.repcols]
             n_written = writer.write_report(tabulation.table, tabn_headers, tabulation)
         else:
@@ -164,7 +188,18 @@ def render_results(
 
     # ***
 
-    def prepare_table_and_columns():
+    def writer_streams_rows(writer):
+        # The base ReportWriter.write_report_table iterates over the table,
+        # so writers that use it can consume a generator. Writers that need
+        # the whole table (e.g., TableWriter) say otherwise.
+        return getattr(writer, "streams_rows", True)
+
+    def writer_width_columns(writer):
+        # Let the writer say which columns' max. widths it needs, if any,
+        # so tabulate_results only measures those columns.
+        return getattr(writer, "width_columns", False)
+
+    def prepare_table_and_columns(results, track_widths=False, streaming=False):
         tabulation = tabulate_results(
             controller,
             results,
@@ -183,6 +218,8 @@ def render_results(
             show_totals=show_totals,
             hide_totals=hide_totals,
             re_sort=re_sort,
+            track_widths=track_widths,
+            streaming=streaming,
         )
         return tabulation
 
@@ -0,0 +1,509 @@
+# This file exists within 'dob-bright':
+#
+#   https://github.com/tallybark/dob-bright
+#
+# Copyright © 2020 Landon Bouma. All rights reserved.
+#
+# This program is free software:  you can redistribute it  and/or  modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any later version  (GPLv3+).
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY;  without even the implied warranty of MERCHANTABILITY or  FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU  General  Public  License  for  more  details.
+#
+# If you lost the GNU General Public License that ships with this software
+# repository (read the 'LICENSE' file), see <http://www.gnu.org/licenses/>.
+
+"""Report per-day totals cache module."""
+
+import datetime
+import hashlib
+import json
+import os
+
+from easy_as_pypi_appdirs import AppDirs
+from nark.backends.sqlalchemy.managers.fact import FactManager
+from nark.backends.sqlalchemy.objects import (
+    AlchemyActivity,
+    AlchemyCategory,
+    AlchemyFact,
+    AlchemyTag,
+)
+from nark.items.fact import Fact
+from nark.items.tag import Tag
+from nark.managers.query_terms import QueryTerms
+from sqlalchemy import func
+
+from .tabulate_results import _GrossTotals
+
+__all__ = (
+    "DailyTotalsCache",
+    # Private:
+    #  '_DayTally',
+    #  '_report_cache_path',
+)
+
+# MAGIC_NUMBER: Bump the version if the cache file format changes,
+# so that old cache files are ignored (and replaced).
+CACHE_VERSION = 2
+
+# The _GrossTotals durations are in days, like the SQLite julianday
+# aggregates in the query results.
+# - MAGIC_NUMBER: 86400000 milliseconds/day.
+MSECS_IN_DAY = 86400000.0
+# - MAGIC_NUMBER: 1970-01-01 is Julian day 2440587.5.
+UNIX_EPOCH = datetime.datetime(1970, 1, 1)
+UNIX_EPOCH_JULIAN_MSECS = 210866760000000
+
+
+def _report_cache_path(basename="report-cache.json"):
+    if not AppDirs.is_ready:
+        return ""
+    # E.g., /home/user/.cache/dob/report-cache.json
+    return os.path.join(AppDirs().user_cache_dir, basename)
+
+
+class _DayTally(object):
+    """One day's totals, and the PKs of the Tags and Activities of its Facts.
+
+    The Tag and Activity names are not cached, because renaming a Tag or an
+    Activity does not change the day's fingerprint. The names are looked up
+    when the totals are read.
+    """
+
+    def __init__(self):
+        # The totals, less the amassed_tags, which are added when read.
+        self.totals = _GrossTotals()
+        # The frequency of each Tag, by its PK.
+        self.tag_freqs = {}
+        # The PKs of the Activities used that day.
+        self.activity_pks = set()
+
+
+class DailyTotalsCache(object):
+    """Maintains the report totals for each day, cached on disk between runs.
+
+    Each day's totals are keyed by a fingerprint of that day's Facts: their
+    count, their max. PK, and their end times. Because nark does not edit a
+    Fact in place, but saves the edit as a new Fact (with a larger PK), the
+    only in-place changes are marking a Fact deleted (which changes the
+    count), and stopping the active Fact (which changes the end times).
+    So any change to a day's Facts changes its fingerprint.
+
+    The fingerprints for the whole range are read with one aggregate query,
+    and the Facts for the changed days (if any) are read with one more.
+
+    A Fact belongs to the day on which it starts, and days are whole days,
+    so the cached totals do not depend on the range being reported.
+
+    Use ``gather_results`` in place of ``FactManager.get_all`` to fetch the
+    results for a daily report (``group_days``), which can then be passed to
+    ``render_results`` or ``tabulate_results`` as usual. (``render_results``
+    does this itself when it is not passed the results.)
+    """
+
+    def __init__(self, controller, cache_path=None):
+        self.controller = controller
+        if cache_path is None:
+            cache_path = _report_cache_path()
+        # If cache_path is empty, the totals are only cached in memory.
+        self.cache_path = cache_path
+        # The cached tallies, keyed by day ISO string: {day: (marker, tally)}.
+        self.entries = None
+
+    # ***
+
+    def gather_results(self, query_terms):
+        """Returns the results for the query, like ``FactManager.get_all``.
+
+        If the query is for a daily report (grouped by day, and otherwise
+        unfiltered), the results are assembled from the cached per-day totals
+        (and the totals for any days that changed, which are tallied anew).
+        Otherwise, the results are fetched from the store.
+        """
+        if not self.can_gather(query_terms):
+            return self.controller.facts.get_all(query_terms=query_terms)
+
+        descending = bool(query_terms.sort_orders) and (
+            query_terms.sort_orders[0] == "desc"
+        )
+        return self.daily_results(query_terms.since, descending=descending)
+
+    def can_gather(self, query_terms):
+        qt = query_terms
+        # The totals are computed like the SQLite julianday aggregates.
+        if self.controller.config["db.engine"] != "sqlite":
+            return False
+        # Because a Fact belongs to the day on which it starts, the since time
+        # must start a day. And because get_all excludes the Facts that end
+        # after the until time (and we do not know which those are, from the
+        # cached totals), there cannot be an until time.
+        return bool(
+            qt.group_days
+            and qt.include_stats
+            and not (qt.group_activity or qt.group_category or qt.group_tags)
+            and not (qt.match_activities or qt.match_categories or qt.match_tags)
+            and not (qt.search_terms or qt.key or qt.deleted)
+            and not (qt.raw or qt.named_tuples or qt.count_results)
+            and not (qt.exclude_ongoing or qt.endless or qt.partial)
+            and not (qt.limit or qt.offset or qt.until)
+            and (
+                qt.since is None
+                or (
+                    isinstance(qt.since, datetime.datetime)
+                    and qt.since.time() == datetime.time()
+                )
+            )
+            and list(qt.sort_cols or ["day"]) == ["day"]
+        )
+
+    def daily_results(self, since=None, descending=False):
+        """Returns a result for each day since the since day, like ``get_all``.
+
+        Each result is a list, the same as ``get_all`` returns for a query that
+        groups by day: A Fact (which represents the day, and which holds the
+        day's Tags and their frequencies), followed by the aggregate columns,
+        as indexed by ``FactManager.RESULT_GRP_INDEX``.
+        """
+        tallies = self.fresh_tallies(since, None)
+        tag_names, actegories = self.resolve_names(tallies.values())
+
+        results = [
+            self.day_result(day, tally, tag_names, actegories)
+            for day, tally in tallies.items()
+        ]
+        if descending:
+            results.reverse()
+        return results
+
+    def day_result(self, day, tally, tag_names, actegories):
+        totals = self.totals_with_tags(tally, tag_names)
+
+        fact_cls = self.controller.store.fact_cls or Fact
+        fact = fact_cls(
+            activity=None,
+            start=totals.first_start,
+            end=totals.final_end,
+            tags=list(totals.amassed_tags.values()),
+        )
+
+        aggs = [None] * len(FactManager.RESULT_GRP_INDEX)
+        aggs[FactManager.RESULT_GRP_INDEX["duration"]] = totals.cum_duration
+        aggs[FactManager.RESULT_GRP_INDEX["group_count"]] = totals.group_count
+        aggs[FactManager.RESULT_GRP_INDEX["first_start"]] = totals.first_start
+        aggs[FactManager.RESULT_GRP_INDEX["final_end"]] = totals.final_end
+        # 0 is what get_all uses in place of the columns it does not group_concat.
+        aggs[FactManager.RESULT_GRP_INDEX["activities"]] = 0
+        # Like get_all, which gives "" if all the names were NULL.
+        aggs[FactManager.RESULT_GRP_INDEX["actegories"]] = (
+            set(
+                actegories[activity_pk]
+                for activity_pk in tally.activity_pks
+                if activity_pk in actegories
+            )
+            or ""
+        )
+        aggs[FactManager.RESULT_GRP_INDEX["categories"]] = 0
+        aggs[FactManager.RESULT_GRP_INDEX["start_date"]] = day
+
+        return [fact] + aggs
+
+    # ***
+
+    def daily_totals(self, since=None, until=None):
+        """Returns the ``_GrossTotals`` for each day between since and until.
+
+        Returns a dict keyed by ``datetime.date``, in date order, with an
+        entry for each day on which at least one Fact starts.
+        """
+        tallies = self.fresh_tallies(since, until)
+        tag_names, _actegories = self.resolve_names(tallies.values())
+
+        return {
+            datetime.date.fromisoformat(day): self.totals_with_tags(tally, tag_names)
+            for day, tally in tallies.items()
+        }
+
+    def gross_totals(self, since=None, until=None):
+        """Returns the ``_GrossTotals`` for all the days between since and until."""
+        gross_totals = _GrossTotals()
+        for totals in self.daily_totals(since, until).values():
+            gross_totals.merge(totals)
+        return gross_totals
+
+    def fresh_tallies(self, since, until):
+        # Returns the _DayTally for each day, in date order, keyed by ISO day.
+        self.load()
+
+        markers = self.query_day_markers(since, until)
+        stale_days = [
+            day for day, marker in markers.items() if not self.is_fresh(day, marker)
+        ]
+        if stale_days:
+            tallies = self.tally_days(stale_days)
+            for day in stale_days:
+                tally = tallies.get(day) or _DayTally()
+                self.entries[day] = (markers[day], tally)
+            self.save()
+
+        return {day: self.entries[day][1] for day in markers}
+
+    def totals_with_tags(self, tally, tag_names):
+        totals = _GrossTotals().merge(tally.totals)
+        for tag_pk, freq in tally.tag_freqs.items():
+            try:
+                name = tag_names[tag_pk]
+            except KeyError:
+                # The Tag was deleted (though its Facts were not).
+                continue
+            totals.update_amassed_tag(Tag(name, tag_pk, freq=freq))
+        return totals
+
+    # ***
+
+    def resolve_names(self, tallies):
+        # Look up the current Tag and Activity names, because either may have
+        # been renamed since the tally was cached.
+        tag_pks = set()
+        activity_pks = set()
+        for tally in tallies:
+            tag_pks.update(tally.tag_freqs.keys())
+            activity_pks.update(tally.activity_pks)
+        return self.query_tag_names(tag_pks), self.query_actegories(activity_pks)
+
+    def query_tag_names(self, tag_pks):
+        if not tag_pks:
+            return {}
+
+        query = self.controller.store.session.query(AlchemyTag.pk, AlchemyTag.name)
+        query = query.filter(AlchemyTag.pk.in_(tag_pks))
+        return dict(query.all())
+
+    def query_actegories(self, activity_pks):
+        if not activity_pks:
+            return {}
+
+        query = self.controller.store.session.query(
+            AlchemyActivity.pk,
+            AlchemyActivity.name,
+            AlchemyCategory.name,
+        )
+        query = query.outerjoin(AlchemyActivity.category)
+        query = query.filter(AlchemyActivity.pk.in_(activity_pks))
+
+        actegories = {}
+        for activity_pk, activity_name, category_name in query.all():
+            # Like get_all, which concatenates the names in SQL, which
+            # yields NULL if either name is NULL (which get_all skips).
+            if activity_name is None or category_name is None:
+                continue
+            actegories[activity_pk] = "{}@{}".format(activity_name, category_name)
+        return actegories
+
+    # ***
+    def query_day_markers(self, since, until):
+        # Expand the range to whole days.
+        since_day, until_day = self.day_range(since, until)
+
+        fact_day = func.date(AlchemyFact.start)
+        query = self.controller.store.session.query(
+            fact_day,
+            func.count(AlchemyFact.pk),
+            # Note that count(col) and total(col) ignore NULLs, so
+            # an active Fact's day has fewer end times than Facts.
+            func.count(AlchemyFact.end),
+            func.max(AlchemyFact.pk),
+            func.total(func.julianday(AlchemyFact.end)),
+        )
+        query = query.filter(AlchemyFact.deleted == False)  # noqa: E712
+        if since_day is not None:
+            query = query.filter(AlchemyFact.start >= since_day)
+        if until_day is not None:
+            query = query.filter(AlchemyFact.start < until_day)
+        query = query.group_by(fact_day).order_by(fact_day)
+
+        markers = {}
+        for day, count, count_end, max_pk, total_end in query.all():
+            # Use a list, which is what JSON gives back to us (see load()).
+            markers[day] = [count, count_end, max_pk, round(total_end, 9)]
+        return markers
+
+    def day_range(self, since, until):
+        since_day = None
+        if since is not None:
+            since_day = datetime.datetime.combine(since.date(), datetime.time())
+        until_day = None
+        if until is not None:
+            until_day = datetime.datetime.combine(until.date(), datetime.time())
+            if until_day < until:
+                until_day += datetime.timedelta(days=1)
+        return since_day, until_day
+
+    def is_fresh(self, day, marker):
+        count, count_end = marker[0], marker[1]
+        if count_end < count:
+            # The active Fact's duration grows until it's stopped.
+            return False
+
+        try:
+            cached_marker, totals = self.entries[day]
+        except KeyError:
+            return False
+
+        return cached_marker == marker
+
+    # ***
+
+    def tally_days(self, days):
+        days = set(days)
+        since = datetime.datetime.fromisoformat(min(days))
+        until = datetime.datetime.fromisoformat(max(days)) + datetime.timedelta(days=1)
+        # Use partial, so that Facts that end after the final day are included.
+        query_terms = QueryTerms(since=since, until=until, partial=True)
+
+        tallies = {}
+        for fact in self.controller.facts.get_all(query_terms=query_terms):
+            day = fact.start.date().isoformat()
+            if day not in days:
+                # A Fact that started before the first stale day, or that
+                # started on a day in the range that's not stale.
+                continue
+            try:
+                tally = tallies[day]
+            except KeyError:
+                tally = _DayTally()
+                tallies[day] = tally
+            self.tally_fact(tally, fact)
+        self.key_tags_by_pk(tallies.values())
+        return tallies
+
+    def tally_fact(self, tally, fact):
+        fact_end = fact.end or self.controller.store.now
+        duration = self.julianday(fact_end) - self.julianday(fact.start)
+        tally.totals.update_durations(duration)
+        tally.totals.update_group_count(1)
+        tally.totals.update_first_and_final(fact.start, fact_end)
+        # The Tags from get_all do not have PKs, so count them by name for
+        # now, and look up their PKs once all the Facts are tallied.
+        for tag in fact.tags:
+            tally.tag_freqs[tag.name] = tally.tag_freqs.get(tag.name, 0) + 1
+        if fact.activity is not None:
+            tally.activity_pks.add(fact.activity.pk)
+
+    def julianday(self, dt):
+        # Compute the duration the same way get_all does, with SQLite julianday
+        # math (which counts whole milliseconds), so that the cached totals are
+        # not different (in the final decimal places) from the queried totals.
+        msecs = (dt - UNIX_EPOCH) // datetime.timedelta(milliseconds=1)
+        return (msecs + UNIX_EPOCH_JULIAN_MSECS) / MSECS_IN_DAY
+
+    def key_tags_by_pk(self, tallies):
+        tag_names = set()
+        for tally in tallies:
+            tag_names.update(tally.tag_freqs.keys())
+        if not tag_names:
+            return
+
+        query = self.controller.store.session.query(AlchemyTag.name, AlchemyTag.pk)
+        query = query.filter(AlchemyTag.name.in_(tag_names))
+        tag_pks = dict(query.all())
+
+        for tally in tallies:
+            tally.tag_freqs = {
+                tag_pks[name]: freq
+                for name, freq in tally.tag_freqs.items()
+                if name in tag_pks
+            }
+
+    # ***
+
+    def load(self):
+        if self.entries is not None:
+            return
+
+        self.entries = {}
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+
+        try:
+            with open(self.cache_path, "r") as cache_f:
+                cached = json.load(cache_f)
+        except (OSError, ValueError) as err:
+            # Not the end of the world: we'll recompute the totals.
+            self.controller.client_logger.warning(
+                "Failed to load report cache at “{}”: {}".format(self.cache_path, err)
+            )
+            return
+
+        if (
+            cached.get("version") != CACHE_VERSION
+            or cached.get("store") != self.store_fingerprint()
+        ):
+            return
+
+        for day, (marker, tally) in cached["days"].items():
+            self.entries[day] = (marker, self.tally_from_dict(tally))
+
+    def save(self):
+        if not self.cache_path:
+            return
+
+        cached = {
+            "version": CACHE_VERSION,
+            "store": self.store_fingerprint(),
+            "days": {
+                day: (marker, self.tally_as_dict(tally))
+                for day, (marker, tally) in self.entries.items()
+            },
+        }
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            # Write to a temporary file and then rename it, so that a
+            # concurrent reader does not see a partially written file.
+            temp_path = "{}.tmp".format(self.cache_path)
+            with open(temp_path, "w") as cache_f:
+                json.dump(cached, cache_f)
+            os.replace(temp_path, self.cache_path)
+        except OSError as err:
+            self.controller.client_logger.warning(
+                "Failed to save report cache at “{}”: {}".format(self.cache_path, err)
+            )
+
+    def store_fingerprint(self):
+        # Hash the URL, so as not to write a database password to the cache.
+        db_url = str(self.controller.store.db_url)
+        return hashlib.sha1(db_url.encode("utf-8")).hexdigest()
+
+    # ***
+
+    def tally_as_dict(self, tally):
+        totals = tally.totals
+        return {
+            "cum_duration": totals.cum_duration,
+            "max_duration": totals.max_duration,
+            "group_count": totals.group_count,
+            "first_start": self.datetime_as_str(totals.first_start),
+            "final_end": self.datetime_as_str(totals.final_end),
+            # JSON keys are strings, so use a list of [pk, freq] pairs.
+            "tag_freqs": list(tally.tag_freqs.items()),
+            "activity_pks": list(tally.activity_pks),
+        }
+
+    def tally_from_dict(self, tally_dict):
+        tally = _DayTally()
+        totals = tally.totals
+        totals.cum_duration = tally_dict["cum_duration"]
+        totals.max_duration = tally_dict["max_duration"]
+        totals.group_count = tally_dict["group_count"]
+        totals.first_start = self.datetime_from_str(tally_dict["first_start"])
+        totals.final_end = self.datetime_from_str(tally_dict["final_end"])
+        tally.tag_freqs = dict(tally_dict["tag_freqs"])
+        tally.activity_pks = set(tally_dict["activity_pks"])
+        return tally
+
+    def datetime_as_str(self, dt):
+        return dt.isoformat() if dt is not None else None
+
+    def datetime_from_str(self, dt_str):
+        return datetime.datetime.fromisoformat(dt_str) if dt_str else None
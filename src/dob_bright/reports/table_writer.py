@@ -39,6 +39,11 @@ class TableWriter(ReportWriter):
     def requires_table(self):
         return True
 
+    @property
+    def streams_rows(self):
+        # The ASCII table generator needs the complete table.
+        return False
+
     def write_report(self, table, headers, tabulation=None):
         # SKIP:
         #   super(TableWriter, self).write_report(table, headers, tabulation)
@@ -15,13 +15,13 @@
 # If you lost the GNU General Public License that ships with this software
 # repository (read the 'LICENSE' file), see <http://www.gnu.org/licenses/>.
 
+import heapq
 from collections import namedtuple
 from collections.abc import Iterable
 from gettext import gettext as _
-from operator import attrgetter
+from operator import itemgetter
 
 from click_hotoffthehamster._compat import term_len
-from nark.backends.sqlalchemy.managers import query_sort_order_at_index
 from nark.backends.sqlalchemy.managers.fact import FactManager
 from nark.helpers.format_time import format_delta
 from nark.items.tag import Tag
@@ -33,6 +33,7 @@ __all__ = (
     # Private:
     #  '_GrossTotals',
     #  '_ReportColumn',
+    #  '_SortDescending',
     #  'ResultsTabulation',
     #  'FACT_TABLE_HEADERS',
 )
@@ -107,6 +108,9 @@ ResultsTabulation = namedtuple("ResultsTabulation", ("table", "repcols", "max_wi
 # ***
 
 
+# The _GrossTotals is a mergeable accumulator: Totals can be tallied
+# separately for different sets of results (e.g., for each day of a
+# report), and then combined, in any grouping, using merge().
 class _GrossTotals(object):
     def __init__(self):
         # Durations summation (duration).
@@ -129,14 +133,19 @@ class _GrossTotals(object):
         self.group_count += group_count
 
     def update_first_and_final(self, first_start, final_end):
+        self.update_first_start(first_start)
+        self.update_final_end(final_end)
+
+    def update_first_start(self, first_start):
         if self.first_start is None:
             self.first_start = first_start
-        else:
+        elif first_start is not None:
             self.first_start = min(self.first_start, first_start)
 
+    def update_final_end(self, final_end):
         if self.final_end is None:
             self.final_end = final_end
-        else:
+        elif final_end is not None:
             self.final_end = max(self.final_end, final_end)
 
     def update_amassed_tags(self, fact_tags):
@@ -152,6 +161,38 @@ class _GrossTotals(object):
         else:
             gross_tag.freq += fact_tag.freq
 
+    def merge(self, other):
+        """Adds the totals from another _GrossTotals to this one (and returns self).
+
+        Merging is associative (and commutative), so totals can be tallied in
+        chunks, in any order, and combined later. The other object is not
+        changed, nor does this object share any of its Tags.
+        """
+        self.cum_duration += other.cum_duration
+        self.max_duration = max(self.max_duration, other.max_duration)
+        self.group_count += other.group_count
+        self.update_first_and_final(other.first_start, other.final_end)
+        self.update_amassed_tags(other.amassed_tags.values())
+        return self
+
+
+# ***
+
+
+# Inverts the ordering of a sort key value, for multi-key
+# sorts whose columns do not all sort in the same direction.
+class _SortDescending(object):
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
 
 # ***
 
@@ -192,22 +233,33 @@ def tabulate_results(
     # results, even if the SQL query already guaranteed their ordering.
     re_sort=False,
     # Include maximum column widths if needed by the output formatter.
+    # - Use True to measure every column, or specify just the columns the
+    #   formatter needs, by name or by position (e.g., [0] for the first).
     track_widths=False,
+    # If the caller's writer can consume rows one at a time, let it. The
+    # table will be a generator, unless a column needs to see every row
+    # before any one row can be finalized (e.g., sparklines, re-sorting,
+    # and width tracking), in which case the rows are buffered as usual.
+    streaming=False,
 ):
     """
     Prepares Facts for display in an ASCII table.
 
-    Returns a (table, header) tuple. 'table' is a list of ``TableRow``
+    Returns a ``ResultsTabulation``. Its 'table' is a list of ``TableRow``
     instances, each representing a single Fact, or the summary of a
-    group of Facts.
+    group of Facts. If ``streaming`` is enabled and the report does not
+    need to buffer, 'table' is instead a generator of ``TableRow``.
     """
     qt = query_terms if query_terms is not None else QueryTerms()
 
     for_journal = output_format == "journal"
-    track_widths = True if for_journal else track_widths
+    if for_journal and not track_widths:
+        # The JournalWriter only needs the width of the first column.
+        track_widths = [0]
 
     columns = []
     repcols = {}
+    col_index = {}
     sorting_columns = None
     # YOU: Uncomment to force running re-sorting code, or use hidden --re-sort.
     #  re_sort = True
@@ -259,36 +311,126 @@ def tabulate_results(
 
         gross_totals = _GrossTotals()
 
-        table_rows = []
+        if must_buffer_rows():
+            table = generate_rows_buffered(TableRow, gross_totals, max_widths)
+        else:
+            table = generate_rows_streaming(TableRow, gross_totals)
+
+        repcols = [FACT_TABLE_HEADERS[column] for column in columns]
+        # Note that max_widths is not complete until the table is, but
+        # only buffered tables track widths (see must_buffer_rows).
+        max_widths_tup = TableRow(**max_widths)
+        tabulation = ResultsTabulation(table, repcols, max_widths_tup)
+
+        return tabulation
+
+    # ***
+
+    def must_buffer_rows():
+        if not streaming:
+            return True
+
+        # Each of these columns needs to see all the results
+        # before it can finalize any one row:
+        # - The caller wants to know the max. width of each column.
+        # - The sparklines are scaled against the max. (or net) duration.
+        # - The durations are padded so their decimal points align.
+        # - The results need to be re-sorted after post-processing.
+        return (
+            track_widths
+            or "sparkline" in columns
+            or ("duration" in columns and output_format in ("table", "journal"))
+            or must_resort()
+        )
+
+    def generate_rows_buffered(TableRow, gross_totals, max_widths):
+        if must_select_top_rows():
+            table_rows = select_top_rows(gross_totals)
+        else:
+            table_rows = []
+            for fact_etc in iterate_results():
+                table_row = prepare_row(fact_etc)
+                table_rows.append(table_row)
+
+                update_gross(fact_etc, gross_totals)
+
+        create_sparklines(table_rows, gross_totals)
+
+        # Measure the (unpadded) values once the rows are otherwise finalized.
+        update_widths(table_rows, max_widths)
+
+        results_final_sort(table_rows)
+
+        table_rows.extend(produce_gross_rows(gross_totals))
+
+        return [TableRow._make(finalize_row(row)) for row in table_rows]
+
+    def generate_rows_streaming(TableRow, gross_totals):
+        for fact_etc in iterate_results():
+            table_row = prepare_row(fact_etc)
+
+            update_gross(fact_etc, gross_totals)
+
+            yield TableRow._make(finalize_row(table_row))
+
+        for table_row in produce_gross_rows(gross_totals):
+            yield TableRow._make(finalize_row(table_row))
+
+    def iterate_results():
         n_row = 0
         for result in results:
             n_row += 1
             if row_limit and row_limit > 0 and n_row > row_limit:
                 break
 
-            fact_etc = prepare_fact_and_aggs_list(result)
-            table_row = prepare_row(fact_etc, max_widths)
-            table_rows.append(table_row)
+            yield prepare_fact_and_aggs_list(result)
 
-            update_gross(fact_etc, gross_totals)
-            update_widths(table_row, max_widths)
+    # +++
 
-        create_sparklines(table_rows, gross_totals, max_widths)
+    # If the results will be re-sorted, the first row_limit results (in
+    # SQL order) are not necessarily the first row_limit rows after the
+    # re-sort. So consider every result, but only keep the top row_limit
+    # rows (per the re-sort order) as we go.
+    # - Note that the totals, like the rows, reflect the top rows only.
 
-        results_final_sort(table_rows)
+    def must_select_top_rows():
+        return (
+            row_limit and row_limit > 0 and len(results) > row_limit and must_resort()
+        )
 
-        table_row = produce_gross(gross_totals)
-        if table_row is not None:
-            empty_row = {key: "" for key in columns}
-            table_rows.append(empty_row)
+    def select_top_rows(gross_totals):
+        sort_key, reverse = compile_sort_key()
+        if sort_key is None:
+            # Nothing to sort by, so the first row_limit rows are the top rows.
+            table_rows = []
+            for fact_etc in iterate_results():
+                table_rows.append(prepare_row(fact_etc))
+
+                update_gross(fact_etc, gross_totals)
+
+            return table_rows
+
+        # Like sorted(), nsmallest and nlargest keep rows with equal keys in
+        # their original order, but they only hold row_limit rows at a time.
+        select_top = heapq.nlargest if reverse else heapq.nsmallest
+        top_rows = select_top(
+            row_limit,
+            prepare_rows_and_results(),
+            key=lambda row_and_result: sort_key(row_and_result[0]),
+        )
+
+        table_rows = []
+        for table_row, fact_etc in top_rows:
             table_rows.append(table_row)
 
-        table = [TableRow(**finalize_row(row)) for row in table_rows]
-        repcols = [FACT_TABLE_HEADERS[column] for column in columns]
-        max_widths_tup = TableRow(**max_widths)
-        tabulation = ResultsTabulation(table, repcols, max_widths_tup)
+            update_gross(fact_etc, gross_totals)
 
-        return tabulation
+        return table_rows
+
+    def prepare_rows_and_results():
+        for result in results:
+            fact_etc = prepare_fact_and_aggs_list(result)
+            yield prepare_row(fact_etc), fact_etc
 
     # ***
 
@@ -298,6 +440,7 @@ def tabulate_results(
         repcols.update(
             {key: val for key, val in FACT_TABLE_HEADERS.items() if key in columns}
         )
+        col_index.update({column: idx for idx, column in enumerate(columns)})
         TableRow = namedtuple("TableRow", columns)
         return TableRow, sortref_cols
 
@@ -565,204 +708,194 @@ def tabulate_results(
         aggregate_cols = group_cols_shim(result)
         return [result] + aggregate_cols
 
-    def prepare_row(fact_etc, max_widths):
+    def prepare_row(fact_etc):
         # Each result is a tuple: First the Fact, and then the
         # aggregate columns (see FactManager.RESULT_GRP_INDEX).
-        (
-            fact,
-            duration,
-            group_count,
-            first_start,
-            final_end,
-            activities,
-            actegories,
-            categories,
-            start_date,
-        ) = fact_etc
-
-        if not final_end:
-            final_end = controller.store.now
-
-        table_row = {}
-
-        prepare_key(table_row, fact)
-
-        prepare_starts_and_end(
-            table_row,
-            fact,
-            first_start,
-            final_end,
-            start_date,
-        )
-        prepare_activity_and_category(
-            table_row,
-            fact,
-            activities,
-            actegories,
-            categories,
-        )
-        prepare_duration(table_row, fact, duration, max_widths)
-        prepare_group_count(table_row, group_count)
-        prepare_first_start(table_row, first_start)
-        prepare_final_end(table_row, final_end)
-        prepare_description(table_row, fact)
-        prepare_deleted(table_row, fact)
+        fact, *aggs = fact_etc
 
-        row_slice = unprepare_unmentioned_columns(table_row)
+        row_builder = fetch_row_builder(aggs)
 
-        return row_slice
+        # Start each cell empty, in case no producer fills it, e.g., if
+        # the user added, say, 'description' to an aggregate query. (This
+        # is us being nice, so we don't stack trace just because the user
+        # specified a "weird" combination of CLI options.)
+        table_row = [""] * len(columns)
+        for idx, produce_cell in row_builder:
+            table_row[idx] = produce_cell(fact, aggs)
 
-    # ***
-
-    def prepare_key(table_row, fact):
-        if "key" not in repcols:
-            return
+        return table_row
 
-        table_row["key"] = fact.pk
-
-    # +++
-
-    def prepare_starts_and_end(table_row, fact, first_start, final_end, start_date):
-        prepare_start_date(table_row, fact, first_start)
-        prepare_start_date_cmp(table_row, fact, first_start, start_date)
-        prepare_start_time(table_row, fact, first_start)
-        prepare_end_date(table_row, fact, final_end)
-        prepare_start(table_row, fact)
-        prepare_end(table_row, fact)
-
-    def prepare_start_date(table_row, fact, first_start):
-        if "start_date" not in repcols:
-            return
-
-        # MAYBE/2020-05-18: Make this and other strftime formats --option'able.
-        start_date = first_start.strftime("%a %b %d") if first_start else ""
-        table_row["start_date"] = start_date
-
-    def prepare_start_date_cmp(table_row, fact, first_start, start_date):
-        if "start_date_cmp" not in repcols:
-            return
-
-        # The SQLite date(col) produces, e.g., '2020-05-14'.
-        if start_date:
-            start_date_cmp = start_date
-        else:
-            start_date_cmp = first_start.strftime("%Y-%m-%d") if first_start else ""
-        table_row["start_date_cmp"] = start_date_cmp
-
-    def prepare_start_time(table_row, fact, first_start):
-        if "start_time" not in repcols:
-            return
-
-        start_time = first_start.strftime(datetime_format) if first_start else ""
-        table_row["start_time"] = start_time
-
-    def prepare_end_date(table_row, fact, final_end):
-        if "end_date" not in repcols:
-            return
-
-        end_date = final_end.strftime("%a %b %d") if final_end else ""
-        table_row["end_date"] = end_date
+    # ***
 
-    def prepare_start(table_row, fact):
-        if "start" not in repcols:
-            return
+    # The columns are fixed once prepare_columns runs, so rather than check
+    # every column for every row, compile a list of just the producers the
+    # report needs, and run that list for each row.
+    # - The activity, category, and tag cells also depend on how the query
+    #   was grouped, as indicated by the aggregate columns. Which is the same
+    #   for every result, so generally we'll only compile one row builder.
+    row_builders = {}
 
-        table_row["start"] = fact.start_fmt(datetime_format)
+    def fetch_row_builder(aggs):
+        grouping = row_grouping(aggs)
+        try:
+            return row_builders[grouping]
+        except KeyError:
+            row_builder = compile_row_builder(grouping)
+            row_builders[grouping] = row_builder
+            return row_builder
 
-    def prepare_end(table_row, fact):
-        if "end" not in repcols:
-            return
+    def row_grouping(aggs):
+        # The special value used is 0, but cannot hurt to check None, too.
+        if aggs[i_activities] not in [None, 0]:
+            return "activities"
+        elif aggs[i_actegories] not in [None, 0]:
+            return "actegories"
+        elif aggs[i_categories] not in [None, 0]:
+            return "categories"
+        return ""
 
-        if fact.end:
-            fact_end = fact.end_fmt(datetime_format)
-        else:
-            # FIXME: This is just the start of supporting open ended Fact in db.
-            if for_journal or qt.include_stats:
-                fact_end = _("<active>")
-            else:
-                fact_end = ""
-            # Replace None with 'now', so that fact.delta() returns something
-            # (that is, if we don't use the 'duration' from the results, which was
-            # calculated by the SQL query (using the computed 'endornow' column)).
-            fact.end = controller.now
-        table_row["end"] = fact_end
+    def compile_row_builder(grouping):
+        grouped_cols = grouping_columns(grouping)
+        # Note that the producers are run in cell_producers() order, and not
+        # column order, because produce_end may set fact.end, which the
+        # producer_duration relies on (via fact.delta()).
+        return [
+            (col_index[column], produce_cell)
+            for column, produce_cell in cell_producers()
+            if column in col_index
+            and (column not in GROUPING_COLUMNS or column in grouped_cols)
+        ]
 
-    # +++
+    GROUPING_COLUMNS = set(
+        [
+            "activity",
+            "activities",
+            "actegories",
+            "actegory",
+            "categories",
+            "category",
+            "tag",
+            "tags",
+        ]
+    )
 
-    def prepare_activity_and_category(
-        table_row,
-        fact,
-        activities,
-        actegories,
-        categories,
-    ):
-        # The special value used is 0, but cannot hurt to check None, too.
-        if activities not in [None, 0]:
+    def grouping_columns(grouping):
+        if grouping == "activities":
             # Grouped by category (and possibly tags, too).
-            prepare_category(table_row, fact)
-            prepare_activities(table_row, activities)
-            prepare_tagnames(table_row, fact)
-        elif actegories not in [None, 0]:
+            return ("category", "activities", "tags")
+        elif grouping == "actegories":
             # Group by tags but not activity or category.
-            prepare_actegories(table_row, actegories)
             if qt.group_days:
-                prepare_tagnames(table_row, fact)
+                return ("actegories", "tags")
             else:
                 # Else, group_tags, so one each.
-                prepare_tagname(table_row, fact)
-        elif categories not in [None, 0]:
+                return ("actegories", "tag")
+        elif grouping == "categories":
             # Group by activity name (and possibly tags, too).
-            prepare_activity(table_row, fact)
-            prepare_categories(table_row, categories)
-            prepare_tagnames(table_row, fact)
+            return ("activity", "categories", "tags")
         else:
             # Group by activity ID and category ID, or no grouping.
             if not for_journal:
-                prepare_activity(table_row, fact)
-                prepare_category(table_row, fact)
+                return ("activity", "category", "tags")
             else:
-                prepare_actegory(table_row, fact)
-            prepare_tagnames(table_row, fact)
+                return ("actegory", "tags")
+
+    def cell_producers():
+        return (
+            ("key", produce_key),
+            ("start_date", produce_start_date),
+            ("start_date_cmp", produce_start_date_cmp),
+            ("start_time", produce_start_time),
+            ("end_date", produce_end_date),
+            ("start", produce_start),
+            ("end", produce_end),
+            ("activity", produce_activity),
+            ("activities", produce_activities),
+            ("actegories", produce_actegories),
+            ("categories", produce_categories),
+            ("category", produce_category),
+            ("actegory", produce_actegory),
+            ("tags", produce_tagnames),
+            ("tag", produce_tagnames),
+            ("duration", produce_duration),
+            ("group_count", produce_group_count),
+            ("first_start", produce_first_start),
+            ("final_end", produce_final_end),
+            ("description", produce_description),
+            ("deleted", produce_deleted),
+        )
 
-    def prepare_activity(table_row, fact):
-        if "activity" not in repcols:
-            return
+    # ***
 
-        table_row["activity"] = fact.activity_name + actcatsep()
+    def produce_key(fact, aggs):
+        return fact.pk
 
-    def prepare_activities(table_row, activities, sep=_(", ")):
-        if "activities" not in repcols:
-            return
+    # +++
 
-        table_row["activities"] = sep.join(
-            [activity + actcatsep() for activity in sorted(activities)]
-        )
+    def produce_start_date(fact, aggs):
+        first_start = aggs[i_first_start]
+        # MAYBE/2020-05-18: Make this and other strftime formats --option'able.
+        return first_start.strftime("%a %b %d") if first_start else ""
 
-    def prepare_actegories(table_row, actegories, sep=_(", ")):
-        if "actegories" not in repcols:
-            return
+    def produce_start_date_cmp(fact, aggs):
+        # The SQLite date(col) produces, e.g., '2020-05-14'.
+        start_date = aggs[i_start_date]
+        if start_date:
+            return start_date
 
-        table_row["actegories"] = sep.join(sorted(actegories))
+        first_start = aggs[i_first_start]
+        return first_start.strftime("%Y-%m-%d") if first_start else ""
 
-    def prepare_categories(table_row, categories, sep=_(", ")):
-        if "categories" not in repcols:
-            return
+    def produce_start_time(fact, aggs):
+        first_start = aggs[i_first_start]
+        return first_start.strftime(datetime_format) if first_start else ""
 
-        table_row["categories"] = sep.join(
-            [actcatsep() + category for category in sorted(categories)]
-        )
+    def produce_end_date(fact, aggs):
+        final_end = final_end_or_now(aggs)
+        return final_end.strftime("%a %b %d") if final_end else ""
 
-    def prepare_category(table_row, fact):
-        if "category" not in repcols:
-            return
+    def produce_start(fact, aggs):
+        return fact.start_fmt(datetime_format)
 
-        table_row["category"] = actcatsep() + fact.category_name
+    def produce_end(fact, aggs):
+        if fact.end:
+            return fact.end_fmt(datetime_format)
 
-    def prepare_actegory(table_row, fact):
-        if "actegory" not in repcols:
-            return
+        # FIXME: This is just the start of supporting open ended Fact in db.
+        if for_journal or qt.include_stats:
+            fact_end = _("<active>")
+        else:
+            fact_end = ""
+        # Replace None with 'now', so that fact.delta() returns something
+        # (that is, if we don't use the 'duration' from the results, which was
+        # calculated by the SQL query (using the computed 'endornow' column)).
+        fact.end = controller.now
+        return fact_end
+
+    def final_end_or_now(aggs):
+        return aggs[i_final_end] or controller.store.now
+
+    # +++
+
+    def produce_activity(fact, aggs):
+        return fact.activity_name + actcatsep()
+
+    def produce_activities(fact, aggs, sep=_(", ")):
+        activities = aggs[i_activities]
+        return sep.join([activity + actcatsep() for activity in sorted(activities)])
+
+    def produce_actegories(fact, aggs, sep=_(", ")):
+        return sep.join(sorted(aggs[i_actegories]))
+
+    def produce_categories(fact, aggs, sep=_(", ")):
+        categories = aggs[i_categories]
+        return sep.join([actcatsep() + category for category in sorted(categories)])
+
+    def produce_category(fact, aggs):
+        return actcatsep() + fact.category_name
 
-        table_row["actegory"] = fact.oid_actegory()
+    def produce_actegory(fact, aggs):
+        return fact.oid_actegory()
 
     # MAYBE/2020-05-18: Make the '@' symbol configable.
     def actcatsep(sep=_("@")):
@@ -772,17 +905,8 @@ def tabulate_results(
 
     # +++
 
-    def prepare_tagnames(table_row, fact):
-        if "tags" not in repcols:
-            return
-
-        table_row["tags"] = assemble_tags(fact.tags)
-
-    def prepare_tagname(table_row, fact):
-        if "tag" not in repcols:
-            return
-
-        table_row["tag"] = assemble_tags(fact.tags)
+    def produce_tagnames(fact, aggs):
+        return assemble_tags(fact.tags)
 
     def assemble_tags(fact_tags):
         tag_names = []
@@ -798,37 +922,27 @@ def tabulate_results(
 
     # +++
 
-    def prepare_duration(table_row, fact, duration, max_widths):
-        if "duration" not in repcols:
-            return
-
+    def produce_duration(fact, aggs):
         # Note that the 'duration' will be similar to fact.format_delta()
         # unless is_grouped, in which case 'duration' is an aggregate value.
         # But in either case, the 'duration' in the results is expressed in days.
-        if "sparkline" not in columns:
+        duration_secs = fact_or_query_duration_secs(fact, aggs[i_cum_duration])
+        if "sparkline" not in col_index:
             # Finalize the duration as a string value.
-            duration = format_fact_or_query_duration(fact, duration)
-            prepare_row_duration(table_row, duration, max_widths)
-        else:
-            # We'll prepare a sparkline later, so keep the durations value
-            # (in secs.), until we post-process it.
-            if not duration:
-                duration = fact.delta().total_seconds()
-            else:
-                duration = convert_duration_days_to_secs(duration)
-            table_row["duration"] = duration
+            return format_duration_cell(duration_secs)
 
-    def format_fact_or_query_duration(fact, duration):
+        # We'll prepare a sparkline later, so keep the durations value
+        # (in secs.), until we post-process it.
+        return duration_secs
+
+    def fact_or_query_duration_secs(fact, duration):
         if not duration:
             # MAYBE/2020-05-18: Use format_duration_secs() instead, to be
             # consistent.
             #  fmt_duration = fact.format_delta(style='')
-            duration_secs = fact.delta().total_seconds()
-        else:
-            #  fmt_duration = format_duration_days(duration)
-            duration_secs = convert_duration_days_to_secs(duration)
-        fmt_duration = format_duration_secs(duration_secs)
-        return fmt_duration
+            return fact.delta().total_seconds()
+        #  fmt_duration = format_duration_days(duration)
+        return convert_duration_days_to_secs(duration)
 
     # - MAGIC_NUMBER: 86400 seconds/day, to convert between timedelta
     #                 (seconds) and SQLite julianday computation (days).
@@ -868,16 +982,19 @@ def tabulate_results(
         )
         return fmt_duration
 
-    def prepare_row_duration(table_row, duration, max_widths):
-        table_row["duration"] = duration
-        update_max_widths_column(table_row, "duration", max_widths)
-        update_duration_apres_dot(duration)
-
-    def update_max_widths_column(table_row, column, max_widths):
-        if not track_widths:
-            return
+    # Reports often have many rows with the same duration (especially when
+    # Facts are entered to the nearest minute or quarter hour), so remember
+    # each formatted duration, rather than calling format_delta every row.
+    duration_cells = {}
 
-        max_widths[column] = max(term_len(table_row[column]), max_widths[column])
+    def format_duration_cell(durasecs):
+        try:
+            return duration_cells[durasecs]
+        except KeyError:
+            fmt_duration = format_duration_secs(durasecs)
+            update_duration_apres_dot(fmt_duration)
+            duration_cells[durasecs] = fmt_duration
+            return fmt_duration
 
     def update_duration_apres_dot(duration):
         if output_format not in ("table", "journal"):
@@ -893,7 +1010,7 @@ def tabulate_results(
 
     # +++
 
-    def create_sparklines(table_rows, gross_totals, max_widths):
+    def create_sparklines(table_rows, gross_totals):
         if "sparkline" not in columns:
             return
 
@@ -928,16 +1045,27 @@ def tabulate_results(
         # - HINT: This option eval-aware, e.g., 1 hour: --spark-secs '60 * 60'.
         spark_chunk_secs = spark_secs or (spark_max_value / spark_chunk_width)
 
-        def prepare_sparkline(table_row):
-            # We stashed the duration as seconds.
-            dur_seconds = table_row["duration"]
-            sparkline = spark_up(dur_seconds, spark_chunk_secs)
-            table_row["sparkline"] = sparkline
-            update_max_widths_column(table_row, "sparkline", max_widths)
-
-            # We've used the seconds value, so now we can format the duration.
-            duration = format_duration_secs(dur_seconds)
-            prepare_row_duration(table_row, duration, max_widths)
+        # The sparklines, keyed by (n_chunks, n_eighths). Most sparklines
+        # in a report are one of just a few dozen distinct bar lengths.
+        sparklines = {}
+
+        def prepare_sparklines():
+            i_duration = col_index["duration"]
+            i_sparkline = col_index["sparkline"]
+            # Rows with the same duration share the same (immutable) strings.
+            duration_sparks = {}
+            for table_row in table_rows:
+                # We stashed the duration as seconds.
+                dur_seconds = table_row[i_duration]
+                try:
+                    sparkline, duration = duration_sparks[dur_seconds]
+                except KeyError:
+                    sparkline = spark_up(dur_seconds, spark_chunk_secs)
+                    # We've used the seconds value, so now we can format it.
+                    duration = format_duration_cell(dur_seconds)
+                    duration_sparks[dur_seconds] = (sparkline, duration)
+                table_row[i_sparkline] = sparkline
+                table_row[i_duration] = duration
 
         def spark_up(dur_seconds, spark_chunk_secs):
             # Thanks to:
@@ -946,8 +1074,17 @@ def tabulate_results(
             #   https://en.wikipedia.org/wiki/Block_Elements
             n_chunks, remainder = divmod(dur_seconds, spark_chunk_secs)
             n_eighths = int(8 * (remainder / spark_chunk_secs))
+            spark_key = (int(n_chunks), n_eighths)
+            try:
+                return sparklines[spark_key]
+            except KeyError:
+                sparkline = draw_sparkline(*spark_key)
+                sparklines[spark_key] = sparkline
+                return sparkline
+
+        def draw_sparkline(n_chunks, n_eighths):
             # Start with the full-width block elements.
-            sparkline = "█" * int(n_chunks)
+            sparkline = "█" * n_chunks
             # Add the fractional block element. Note that the Unicode
             # code points for block elements are decreasingly ordered,
             # (8/8), (7/8), (6/8), etc., so subtract the number of eighths.
@@ -964,84 +1101,30 @@ def tabulate_results(
 
         # +++
 
-        for table_row in table_rows:
-            prepare_sparkline(table_row)
+        prepare_sparklines()
 
     # +++
 
-    def prepare_group_count(table_row, group_count):
-        if "group_count" not in repcols:
-            return
+    def produce_group_count(fact, aggs):
+        return str(aggs[i_group_count])
 
-        table_row["group_count"] = str(group_count)
+    def produce_first_start(fact, aggs):
+        first_start = aggs[i_first_start]
+        return first_start.strftime(datetime_format) if first_start else ""
 
-    def prepare_first_start(table_row, first_start):
-        if "first_start" not in repcols:
-            return
-
-        first_start = first_start.strftime(datetime_format) if first_start else ""
-        table_row["first_start"] = first_start
-
-    def prepare_final_end(table_row, final_end):
-        if "final_end" not in repcols:
-            return
-
-        final_end = final_end.strftime(datetime_format) if final_end else ""
-        table_row["final_end"] = final_end
+    def produce_final_end(fact, aggs):
+        final_end = final_end_or_now(aggs)
+        return final_end.strftime(datetime_format) if final_end else ""
 
     # +++
 
-    def prepare_description(table_row, fact):
-        if "description" not in repcols:
-            return
-
-        table_row["description"] = fact.description or ""
+    def produce_description(fact, aggs):
+        return fact.description or ""
 
     # +++
 
-    def prepare_deleted(table_row, fact):
-        if "deleted" not in repcols:
-            return
-
-        table_row["deleted"] = str(fact.deleted)
-
-    # ***
-
-    # MAYBE/2020-05-20: This function can probably be removed.
-    # (lb): I added `X not in repcols` checks to all the `table_row[Y] =` functions.
-    # So I'd guess the table_row is has the correct attrs, and none superfluous.
-    def unprepare_unmentioned_columns(table_row):
-        if not custom_columns:
-            return table_row
-
-        # Rebuild the table row, but exclude excluded columns.
-        # (lb): We could add `'column' not in columns` to every prepare_*
-        # function, but that'd be noisy. Seems better to rebuild the dict.
-        row_slice = {key: val for key, val in table_row.items() if key in columns}
-
-        # Add any columns the user specified that are missing, e.g.,
-        # if the user added, say, 'description' to an aggregate query.
-        # (This is us being nice, so we don't stack trace just because
-        # the user specified a "weird" combination of CLI options.)
-        missing = [key for key in columns if key not in row_slice]
-        for key in missing:
-            row_slice[key] = ""
-
-        # +++
-
-        # 2020-05-21: (lb): If you're confident other mechanisms are WAD,
-        # you could disable/delete unprepare_unmentioned_columns. The old
-        # post-processing would populate most/all possible columns, and
-        # then remove columns that are not needed (and that TableRow would
-        # complain about). The new post-processing is more deliberate and
-        # should not have extraneous columns to remove.
-        if row_slice != table_row:
-            controller.client_logger.warning(
-                f"Unexpected: row_slice != table_row"
-                f" / row_slice: {row_slice} / table_row: {table_row}"
-            )
-
-        return row_slice
+    def produce_deleted(fact, aggs):
+        return str(fact.deleted)
 
     # ***
 
@@ -1060,25 +1143,49 @@ def tabulate_results(
 
     # +++
 
-    def update_widths(table_row, max_widths):
-        if not track_widths:
+    def update_widths(table_rows, max_widths):
+        # Rather than measure every cell as each row is prepared, measure
+        # just the columns the caller asked for, and only after the rows
+        # are ready (so, e.g., the sparklines and durations are strings).
+        width_columns = resolve_width_columns()
+        if not width_columns:
             return
 
-        for column in columns:
-            try:
-                max_widths[column] = max(
-                    term_len(table_row[column]), max_widths[column]
-                )
-            except TypeError:
-                # Not a string, e.g., an int or float.
-                pass
-            except KeyError:
-                # 'sparkline' not computed until end so in columns but not in table_row.
-                assert column == "sparkline"
-                pass
+        for column in width_columns:
+            idx = col_index[column]
+            for table_row in table_rows:
+                try:
+                    cell_width = term_len(table_row[idx])
+                    max_widths[column] = max(cell_width, max_widths[column])
+                except TypeError:
+                    # Not a string, e.g., an int or float.
+                    pass
+
+    def resolve_width_columns():
+        if not track_widths:
+            return []
+        elif track_widths is True:
+            return columns
+
+        width_columns = []
+        for column in track_widths:
+            if isinstance(column, int):
+                if column < len(columns):
+                    width_columns.append(columns[column])
+            elif column in columns:
+                width_columns.append(column)
+        return width_columns
 
     # +++
 
+    def produce_gross_rows(gross_totals):
+        table_row = produce_gross(gross_totals)
+        if table_row is None:
+            return []
+
+        empty_row = [""] * len(columns)
+        return [empty_row, table_row]
+
     def produce_gross(gross_totals):
         if (
             (gross_totals is None or not qt.include_stats)
@@ -1108,10 +1215,7 @@ def tabulate_results(
         produce_gross_final_end(gross_totals, table_row)
         produce_gross_amassed_tags(gross_totals, table_row)
 
-        # Remove columns that may be omitted.
-        row_slice = unprepare_unmentioned_columns(table_row)
-
-        return row_slice
+        return [table_row[column] for column in columns]
 
     def produce_gross_duration(gross_totals, table_row):
         if "duration" not in repcols:
@@ -1158,22 +1262,23 @@ def tabulate_results(
         return row
 
     def finalize_row_duration(row):
-        if "duration" not in row or col_adjust["duration_apres_dot"] < 0:
+        if "duration" not in col_index or col_adjust["duration_apres_dot"] < 0:
             return
 
+        i_duration = col_index["duration"]
         try:
-            apres_dot = term_len(row["duration"]) - row["duration"].index(".")
+            apres_dot = term_len(row[i_duration]) - row[i_duration].index(".")
         except ValueError:
             pass
         else:
             if apres_dot < col_adjust["duration_apres_dot"]:
-                row["duration"] += " " * (col_adjust["duration_apres_dot"] - apres_dot)
+                row[i_duration] += " " * (col_adjust["duration_apres_dot"] - apres_dot)
 
     # ***
 
-    def results_final_sort(table):
-        if not table or not qt.sort_cols:
-            return
+    def must_resort():
+        if not qt.sort_cols:
+            return False
 
         # Check each sort_col to see if we care, i.e. if get_all was not
         # able to sort on that value in the SQL statement. First check
@@ -1183,26 +1288,68 @@ def tabulate_results(
             [sort_attrs_for_col(sort_col, lazy=True) for sort_col in qt.sort_cols]
         )
 
-        if not needs_sort and not re_sort:
-            controller.client_logger.warning("Skipping re-sort.")
+        return needs_sort or re_sort
+
+    def results_final_sort(table):
+        if not table or not qt.sort_cols:
+            return
+
+        if not must_resort():
+            controller.client_logger.debug("Skipping re-sort.")
             return
-        controller.client_logger.warning("Post Processing: Re-SORTing.")
+        controller.client_logger.debug("Post Processing: Re-SORTing.")
 
+        sort_key, reverse = compile_sort_key()
+        if sort_key is None:
+            return
+
+        table.sort(key=sort_key, reverse=reverse)
+
+    def compile_sort_key():
+        sort_cells = assemble_sort_cells()
+        if not sort_cells:
+            return None, False
+
+        # If every column sorts the same direction, let sort() do the
+        # reversing. (Note that reverse=True, like _SortDescending, keeps
+        # rows with equal keys in their original order.)
+        descendings = set([descending for idx, descending in sort_cells])
+        if len(descendings) == 1:
+            indices = [idx for idx, descending in sort_cells]
+            return itemgetter(*indices), descendings.pop()
+
+        # Otherwise wrap the values of the descending columns to invert them.
+        def sort_key(table_row):
+            return tuple(
+                _SortDescending(table_row[idx]) if descending else table_row[idx]
+                for idx, descending in sort_cells
+            )
+
+        return sort_key, False
+
+    def assemble_sort_cells():
+        # Gather the cell index and the direction of each sort attribute,
+        # most significant first, so we can sort on them all in one pass.
+        sort_cells = []
         expect_cols = sorting_columns.copy()
         for idx, sort_col in reversed(list(enumerate(qt.sort_cols))):
-            sort_order = query_sort_order_at_index(qt.sort_orders, idx)
-            sort_results_sort_col(table, sort_col, sort_order, expect_cols)
-
-    def sort_results_sort_col(table, sort_col, sort_order, expect_cols):
-        # Because we are redoing the whole sort, use lazy=False.
-        sort_attrs = sort_attrs_for_col(sort_col, lazy=False)
-        verify_available_sort_cols_match_anticipated(sort_attrs, expect_cols)
-        sort_attrs.reverse()
-        for sort_attr in sort_attrs:
-            reverse = sort_order == "desc"
-            table.sort(key=attrgetter(sort_attr), reverse=reverse)
-
-        return table
+            descending = sort_descending_at_index(idx)
+            # Because we are redoing the whole sort, use lazy=False.
+            sort_attrs = sort_attrs_for_col(sort_col, lazy=False)
+            verify_available_sort_cols_match_anticipated(sort_attrs, expect_cols)
+            sort_cells[:0] = [
+                (col_index[sort_attr], descending) for sort_attr in sort_attrs
+            ]
+        return sort_cells
+
+    # Ref: nark.backends.sqlalchemy.managers.query_sort_order_at_index,
+    # which returns the SQLAlchemy ordering function (asc or desc), and
+    # not the order name, so it's not so useful to us.
+    def sort_descending_at_index(idx):
+        try:
+            return bool(qt.sort_orders) and qt.sort_orders[idx] == "desc"
+        except IndexError:
+            return False
 
     def sort_attrs_for_col(sort_col, lazy):
         # MAYBE/2020-05-20: Replace this fnc. with sort_col_actual.
@@ -24,13 +24,16 @@ from easy_as_pypi_config.fileboss import create_configobj
 from easy_as_pypi_termio.errors import echo_warning
 
 from . import load_obj_from_internal, style_conf
+from .style_engine import StyleEngine, compile_rule_eval
 
 __all__ = (
     "load_style_classes",
+    "load_style_engine",
     "load_style_rules",
     "load_rules_conf",
     "resolve_named_style",
     "resolve_path_rules",
+    "resolve_rules_eval_budget",
     "resolve_path_styles",
     "DEFAULT_STYLE",
 )
@@ -164,17 +167,13 @@ def load_style_rules(controller):
         # it now to check for errors, with the bonus that it's cached for later
         # ((lb): not that you'd likely notice any change in performance with or
         # without the pre-compile).
+        # - The StyleEngine runs each eval as a function of just a few names
+        #   (see compile_rule_eval), so only the Fact's values are in scope.
         for section, rules in rules_confobj.items():
             if "eval" not in rules:
                 continue
             try:
-                rules["__eval__"] = compile(
-                    source=rules["eval"],
-                    filename="<string>",
-                    # Specifying 'eval' because single expression.
-                    # Could use 'exec' for sequence of statements.
-                    mode="eval",
-                )
+                rules["__eval__"] = compile_rule_eval(rules["eval"])
             except Exception as err:
                 rules_path = resolve_path_rules(controller.config)
                 msg = _("compile() failed on 'eval' from “{0}” in “{1}”: {2}").format(
@@ -192,6 +191,21 @@ def load_style_rules(controller):
 # ***
 
 
+def load_style_engine(controller, rules_confobj=None, keep_evals=False):
+    """Returns a StyleEngine for the user's style rules (such as the Carousel uses).
+
+    Loads the rules (unless passed rules_confobj), and sets the engine's eval()
+    budget from the user's config, i.e., ``editor.rules_eval_budget``.
+    """
+    if rules_confobj is None:
+        rules_confobj = load_style_rules(controller)
+    eval_budget = resolve_rules_eval_budget(controller.config)
+    return StyleEngine(rules_confobj, eval_budget=eval_budget, keep_evals=keep_evals)
+
+
+# ***
+
+
 def load_rules_conf(config):
     def _load_rules_conf():
         rules_path = resolve_path_rules(config)
@@ -233,3 +247,12 @@ CFG_KEY_RULESETS_FPATH = "editor.rules_fpath"
 
 def resolve_path_rules(config):
     return config[CFG_KEY_RULESETS_FPATH]
+
+
+# ***
+
+CFG_KEY_RULES_EVAL_BUDGET = "editor.rules_eval_budget"
+
+
+def resolve_rules_eval_budget(config):
+    return config[CFG_KEY_RULES_EVAL_BUDGET]
@@ -15,6 +15,7 @@
 # If you lost the GNU General Public License that ships with this software
 # repository (read the 'LICENSE' file), see <http://www.gnu.org/licenses/>.
 
+import time
 from gettext import gettext as _
 
 from config_decorator.config_decorator import ConfigDecorator
@@ -23,18 +24,25 @@ from easy_as_pypi_config.fileboss import create_configobj, echo_config_obj
 from easy_as_pypi_termio.echoes import click_echo, highlight_value
 from easy_as_pypi_termio.errors import echo_warning, exit_warning
 from easy_as_pypi_termio.style import attr
+from nark.managers.query_terms import QueryTerms
 
 from ..config.config_table import echo_config_decorator_table
 from ..crud.interrogate import run_editor_safe
+from ..reports.render_results import render_results
 from .create_conf import create_basic_conf
-from .load_styling import load_rules_conf, load_style_rules, resolve_path_rules
+from .load_styling import (
+    load_rules_conf,
+    load_style_engine,
+    load_style_rules,
+    resolve_path_rules,
+)
 from .rules_conf import create_style_rules_object
-from .style_engine import StyleEngine
 
 __all__ = (
     "create_rules_conf",
     "echo_rules_conf",
     "echo_rule_names",
+    "echo_rules_profile",
     "echo_rules_table",
     "edit_rules_conf",
 )
@@ -153,8 +161,7 @@ def echo_rules_table(controller, name, output_format):
         return rule_name, ruleset
 
     def fetch_existing_rule():
-        rules_confobj = load_style_rules(controller)
-        styling_rules = StyleEngine(rules_confobj)
+        styling_rules = load_style_engine(controller)
         try:
             ruleset = styling_rules.rulesets[name]
         except KeyError:
@@ -176,3 +183,102 @@ def echo_rules_table(controller, name, output_format):
         )
 
     _echo_rules_table()
+
+
+# *** [PROFILE] RULES
+
+
+def echo_rules_profile(
+    controller, since=None, until=None, limit=1000, output_format="table"
+):
+    """Replays the rules against stored Facts, and reports what each rule costs.
+
+    Checks each ruleset against the latest Facts (up to limit, and between
+    since and until, if specified), and reports how many Facts each ruleset
+    matches, how long it took to check them all, how much of that time was
+    spent in its eval, how many times its eval failed, and how many times its
+    eval ran over the budget (``editor.rules_eval_budget``). Unlike the Carousel,
+    the profiler does not disable an eval that fails or runs over budget. The
+    rulesets are listed from most to least time spent.
+    """
+
+    def _echo_rules_profile():
+        rules_confobj = load_style_rules(controller)
+        if rules_confobj is None:
+            echo_error_no_rules_conf()
+            return
+        # Keep running each eval, even if it fails or is slow; we want to know.
+        styling_rules = load_style_engine(controller, rules_confobj, keep_evals=True)
+        facts = fetch_sample_facts()
+        results = profile_rulesets(styling_rules, facts)
+        print_profile_table(results, styling_rules.eval_budget)
+
+    def echo_error_no_rules_conf():
+        msg = _("No rules file at: {0}").format(resolve_path_rules(controller.config))
+        echo_warning(msg)
+
+    def fetch_sample_facts():
+        query_terms = QueryTerms(
+            since=since,
+            until=until,
+            partial=True,
+            sort_cols=("start",),
+            sort_orders=("desc",),
+            limit=limit or None,
+        )
+        return controller.facts.get_all(query_terms=query_terms)
+
+    def profile_rulesets(styling_rules, facts):
+        # Read each Fact's names once, so they do not count against any rule.
+        fact_features = [(fact, styling_rules.fact_features(fact)) for fact in facts]
+        results = []
+        for section, ruleset in styling_rules.rulesets.items():
+            matches = 0
+            began = time.perf_counter()
+            for fact, features in fact_features:
+                if styling_rules.ruleset_triggered(section, fact, features):
+                    matches += 1
+            elapsed = time.perf_counter() - began
+            rule_eval = styling_rules.rule_evals.get(section)
+            results.append(
+                [
+                    section,
+                    bool(ruleset["disabled"]),
+                    matches,
+                    len(fact_features),
+                    as_msecs(elapsed),
+                    as_msecs(rule_eval.elapsed) if rule_eval else 0.0,
+                    rule_eval.failures if rule_eval else 0,
+                    rule_eval.overruns if rule_eval else 0,
+                ]
+            )
+        results.sort(key=lambda row: row[4], reverse=True)
+        return results
+
+    def as_msecs(secs):
+        return round(secs * 1000, 3)
+
+    def print_profile_table(results, eval_budget):
+        if eval_budget:
+            overruns_header = _("Over {0} ms").format(eval_budget)
+        else:
+            # No budget, so no overruns (the column is all zeros).
+            overruns_header = _("Over budget")
+        headers = [
+            _("Rule"),
+            _("Disabled"),
+            _("Matches"),
+            _("Facts"),
+            _("Time (ms)"),
+            _("Eval (ms)"),
+            _("Eval failures"),
+            overruns_header,
+        ]
+        render_results(
+            controller,
+            results=results,
+            headers=headers,
+            output_format=output_format,
+        )
+
+    _echo_rules_profile()
@@ -62,6 +62,9 @@ def create_style_rules_object():
         def eval(self):
             # E.g.,
             #   eval = fact.category_name == 'My Category'
+            # The eval can also use the Fact's activity and category names,
+            # and its set of tag names (see style_engine.compile_rule_eval), e.g.
+            #   eval = category == 'My Category' and 'my-tag' in tags
             return ""
 
         @property
@@ -17,7 +17,10 @@
 
 """~/.config/dob/styling/rules.conf definition and encapsulating class."""
 
+import builtins
 import os
+import time
+from collections import OrderedDict, namedtuple
 from gettext import gettext as _
 
 from easy_as_pypi_config.fileboss import warn_user_config_errors
@@ -28,22 +31,263 @@ from prompt_toolkit.widgets.base import Label, TextArea
 #                        Or should we use the Carousel (e.g., PPT modal)?
 from easy_as_pypi_termio.errors import echo_warning
 
+from ..config import ConfigRoot
 from .rules_conf import create_style_rules_object
 
-__all__ = ("StyleEngine",)
+__all__ = (
+    "compile_rule_eval",
+    "StyleEngine",
+    # Private:
+    #  '_FactFeatures',
+    #  '_RuleEval',
+    #  '_RulesetPredicate',
+    #  '_RulesetsIndex',
+    #  '_unwrap_syntax_error',
+)
+
+
+# MAGIC_NUMBER: How many (Fact, component) style results to remember. The
+# Carousel styles a few dozen components per Fact, so this is enough for
+# scrolling back and forth over a few dozen Facts.
+STYLE_MEMO_SIZE = 2048
+
+
+# The Fact attributes that the rules test, read once per Fact.
+_FactFeatures = namedtuple(
+    "_FactFeatures",
+    ("activity_name", "category_name", "tag_names"),
+)
+
+
+class _RulesetPredicate(
+    namedtuple(
+        "_RulesetPredicate",
+        ("activities", "categories", "tags_any", "tags_all"),
+    )
+):
+    """The conditions from one ruleset, compiled to frozensets.
+
+    Combines the rules that name the same thing, e.g., the user might specify
+    ``activity = Name1`` and ``activities = Name2``, so that each Fact can be
+    checked against each set of names just once.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_ruleset(cls, ruleset):
+        def names(*keys):
+            combined = set()
+            for key in keys:
+                value = ruleset[key]
+                if not value:
+                    continue
+                if isinstance(value, str):
+                    combined.add(value)
+                else:
+                    combined.update(value)
+            return frozenset(combined)
+
+        return cls(
+            activities=names("activity", "activities"),
+            categories=names("category", "categories"),
+            # (lb): Because I'm too accommodating, a zillion ways to conditional tags.
+            tags_any=names("tag", "tags", "tags-any", "tags-or"),
+            tags_all=names("tags-all", "tags-and"),
+        )
+
+    def probe(self, features):
+        # Returns 0 if there are no conditions, 1 if all conditions pass,
+        # or -1 if any condition fails. See ruleset_triggered.
+        trinary = 0
+
+        if self.activities:
+            if features.activity_name not in self.activities:
+                return -1
+            trinary = 1
+
+        if self.categories:
+            if features.category_name not in self.categories:
+                return -1
+            trinary = 1
+
+        if self.tags_any:
+            if self.tags_any.isdisjoint(features.tag_names):
+                return -1
+            trinary = 1
+
+        if self.tags_all:
+            if not self.tags_all.issubset(features.tag_names):
+                return -1
+            trinary = 1
+
+        return trinary
+
+
+class _RulesetsIndex(object):
+    """Finds the rulesets that might match a Fact, by the Fact's names.
+
+    Each ruleset is filed under the names from one of its conditions, which
+    the Fact must match for the ruleset to be triggered: under each of its
+    activity names, if any; else under each of its category names; else
+    under each of its any-of tag names; else under one of its all-of tags.
+    Rulesets without conditions (e.g., only an eval) are always candidates.
+    """
+
+    def __init__(self, predicates):
+        # The candidates are returned in the order the rulesets were given,
+        # which is the order the classes are applied.
+        self.sections = []
+        self.always = []
+        self.by_activity = {}
+        self.by_category = {}
+        self.by_tag = {}
+        for pos, (section, predicate) in enumerate(predicates):
+            self.sections.append(section)
+            self.file_ruleset(pos, predicate)
+
+    def file_ruleset(self, pos, predicate):
+        if predicate.activities:
+            names, index = predicate.activities, self.by_activity
+        elif predicate.categories:
+            names, index = predicate.categories, self.by_category
+        elif predicate.tags_any:
+            names, index = predicate.tags_any, self.by_tag
+        elif predicate.tags_all:
+            names, index = (min(predicate.tags_all),), self.by_tag
+        else:
+            self.always.append(pos)
+            return
+        for name in names:
+            index.setdefault(name, []).append(pos)
+
+    def candidates(self, features):
+        positions = set(self.always)
+        positions.update(self.by_activity.get(features.activity_name, ()))
+        positions.update(self.by_category.get(features.category_name, ()))
+        for tag_name in features.tag_names:
+            positions.update(self.by_tag.get(tag_name, ()))
+        return [self.sections[pos] for pos in sorted(positions)]
+
+
+# The names that a rule's eval can use: the Fact, and its activity name,
+# category name, and set of tag names, e.g.,
+#   eval = category == 'My Category' and 'my-tag' not in tags
+RULE_EVAL_ARGS = "fact, activity, category, tags"
+
+
+def compile_rule_eval(source):
+    """Compiles a rule's eval expression as the body of a function.
+
+    Evaluating the code returns a function of ``RULE_EVAL_ARGS``, so the
+    expression sees just those names (and the builtins), as fast locals.
+    """
+    try:
+        return compile(
+            source="lambda {}: (\n{}\n)".format(RULE_EVAL_ARGS, source),
+            filename="<string>",
+            # Specifying 'eval' because single expression.
+            mode="eval",
+        )
+    except SyntaxError:
+        # The lambda line shifts the expression down one line. So that the error
+        # reports the rule's own line numbers, compile the expression again, in
+        # parentheses that open on its first line (and remove the parenthesis
+        # from the error's text and offsets).
+        try:
+            compile(source="({}\n)".format(source), filename="<string>", mode="eval")
+        except SyntaxError as err:
+            _unwrap_syntax_error(err, source)
+            raise
+        raise
+
+
+def _unwrap_syntax_error(err, source):
+    if err.lineno == 1:
+        if err.text and err.text.startswith("("):
+            err.text = err.text[1:]
+        if err.offset:
+            err.offset = max(1, err.offset - 1)
+        if err.end_offset and err.end_lineno == 1:
+            err.end_offset = max(1, err.end_offset - 1)
+    # If the error is on the closing parenthesis' line, blame the end of the
+    # expression instead (e.g., for a trailing operator).
+    source_lines = source.splitlines() or [""]
+    if err.lineno is not None and err.lineno > len(source_lines):
+        err.lineno = len(source_lines)
+        err.text = source_lines[-1]
+        err.offset = len(err.text) + 1
+    if err.end_lineno is not None and err.end_lineno > len(source_lines):
+        err.end_lineno = err.lineno
+        err.end_offset = err.offset
+
+
+class _RuleEval(object):
+    """A ruleset's eval function, and how long it's taken to run."""
+
+    def __init__(self, compiled_code):
+        self.func = eval(compiled_code, {"__builtins__": builtins})
+        self.disabled = False
+        self.calls = 0
+        self.elapsed = 0.0
+        self.last_elapsed = 0.0
+        self.failures = 0
+        # How many calls ran longer than the StyleEngine's eval_budget.
+        self.overruns = 0
+
+    def __call__(self, fact, features):
+        self.calls += 1
+        began = time.perf_counter()
+        try:
+            return self.func(
+                fact, features.activity_name, features.category_name, features.tag_names
+            )
+        finally:
+            self.last_elapsed = time.perf_counter() - began
+            self.elapsed += self.last_elapsed
 
 
 class StyleEngine(object):
     """Encapsulate Carousel-specific user configurable styling, PPT class names,
     and Pygments style syntax."""
 
-    def __init__(self, rules_confobj):
+    def __init__(self, rules_confobj, eval_budget=None, keep_evals=False):
         # The caller passes a dict-like object of rules read from
         # the user's rules.conf file. We convert that to a RulesRoot
         # object, which encapsulates business logic in a dict-like
         # candy wrapper.
         self.rulesets = self.consume_style_rules_conf(rules_confobj)
 
+        # The conditions from each ruleset, compiled once, keyed by section.
+        self.predicates = {
+            section: _RulesetPredicate.from_ruleset(ruleset)
+            for section, ruleset in self.rulesets.items()
+        }
+
+        # The eval function from each ruleset that has one, keyed by section.
+        self.rule_evals = {
+            section: _RuleEval(ruleset["__eval__"])
+            for section, ruleset in self.rulesets.items()
+            if ruleset["__eval__"] is not None
+        }
+        # The time (in msecs.) that one eval may take to style a component,
+        # after which the eval is disabled, so it does not stall the Carousel.
+        # Unless the caller says otherwise, use the user's config (0 for none).
+        if eval_budget is None:
+            eval_budget = ConfigRoot["editor.rules_eval_budget"]
+        self.eval_budget = eval_budget
+        # Unless keep_evals, an eval that fails or that runs over budget is
+        # disabled. (The rules profiler keeps them, to count every failure
+        # and overrun.)
+        self.keep_evals = keep_evals
+
+        # The Carousel styles each of a Fact's components in turn, so remember
+        # the features of the most recent Fact, and the Fact's activity and
+        # tags from which they were read. (A Fact's activity and tags list are
+        # replaced, not edited in place, when the Fact is edited.)
+        self.features_source = None
+        self.features = None
+
         # As the Carousel builds the PPT UX and creates and add components
         # to it, it'll register each stylable component. At that time, we
         # will find all the applicable user-defined rules (from self.rulesets),
@@ -52,6 +296,16 @@ class StyleEngine(object):
         # time, at least the rulesets will be cached.)
         # - tl;dr, This is a ruleset cache for each of the stylable PPT components.
         self.componentry = {}
+        # And for each component, an index of its rulesets, to find the few
+        # that might match each Fact without probing them all.
+        self.componentry_index = {}
+
+        # The classes from the rulesets triggered by each Fact, for each
+        # component, keyed by the component and the Fact's content, so that
+        # redrawing a Fact does not run the rules (and their evals) again.
+        # - Each StyleEngine is made from the rules.conf, so reloading the
+        #   rules makes a new (empty) memo.
+        self.style_memo = OrderedDict()
 
     # ***
 
@@ -82,65 +336,53 @@ class StyleEngine(object):
 
     # ***
 
-    def process_style_rules(self, ppt_widget, friendly_name, fact):
-        # Here's an example rules.conf contents that'll get you here:
-        #   $ cat ~/.config/dob/styling/rules.conf
-        #   [My Category Style]
-        #   category_name = 'My Category'
-        #   scrollable_frame = class:my-category
-        # and then your corresponding class could be defined as:
-        #   $ cat ~/.config/dob/styling/styles.conf
-        #   [my-style]
-        #   my-category = 'bg:#CA85AC #000000'
-        # and then wire it all via the config:
-        #   $ dob config set style my-style
-
-        def _process_style_rules():
-            rulesets = rules_for_component(friendly_name)
-            return apply_triggered_style_rules(ppt_widget, rulesets, fact)
-
-        # ***
-
-        def rules_for_component(friendly_name):
-            try:
-                return self.componentry[friendly_name]
-            except KeyError:
-                return assemble_component_rulesets(friendly_name)
-
-        def assemble_component_rulesets(friendly_name):
-            rebuild_component_rulesets_list(friendly_name)
-            return self.componentry[friendly_name]
-
-        def rebuild_component_rulesets_list(friendly_name):
-            self.componentry[friendly_name] = {}
-            for section, ruleset in self.rulesets.items():
-                # The friendly_name is the name of the component in the UX.
-                # The user uses the friendly_name in the rules.conf to add
-                # a class string to the component. Check here if it's empty,
-                # meaning the user does not have this setting in their conf
-                # (and the default '' was used); or, the user specified the
-                # setting by set it to the empty string.
-                if not ruleset[friendly_name]:
-                    continue
-                if ruleset["disabled"]:
-                    continue
-                # We're just building a convenience lookup of rules that apply
-                # to the named component. We'll run the rules check later.
-                self.componentry[friendly_name][section] = ruleset
-
-        # ***
+    def fact_features(self, fact):
+        source = (fact, fact.activity, fact.tags)
+        if self.features_source is None or any(
+            this is not that for this, that in zip(source, self.features_source)
+        ):
+            self.features = _FactFeatures(
+                activity_name=fact.activity_name,
+                category_name=fact.category_name,
+                tag_names=frozenset(tag.name for tag in fact.tags),
+            )
+            self.features_source = source
+        return self.features
+
+    def style_memo_key(self, friendly_name, fact):
+        # An active Fact's duration grows, which an eval might check.
+        if fact.end is None:
+            return None
+        # An edited Fact has new dirty_reasons, and different content.
+        dirty_reasons = getattr(fact, "dirty_reasons", ())
+        return (
+            friendly_name,
+            fact.pk,
+            fact.start,
+            fact.end,
+            fact.description,
+            fact.deleted,
+            self.fact_features(fact),
+            frozenset(dirty_reasons),
+        )
+
+    def style_memo_fetch(self, memo_key):
+        custom_classes = self.style_memo.get(memo_key)
+        if custom_classes is not None:
+            self.style_memo.move_to_end(memo_key)
+        return custom_classes
+
+    def style_memo_store(self, memo_key, custom_classes):
+        self.style_memo[memo_key] = custom_classes
+        if len(self.style_memo) > STYLE_MEMO_SIZE:
+            self.style_memo.popitem(last=False)
 
-        def apply_triggered_style_rules(ppt_widget, rulesets, fact):
-            accumulated = ""
-            for section, ruleset in rulesets.items():
-                if not ruleset_triggered(section, ruleset, fact):
-                    continue
-                accumulated += apply_style_rule_class(ppt_widget, ruleset)
-            return accumulated
+    # ***
 
-        # ***
+    def ruleset_triggered(self, section, fact, features=None):
+        """Returns True if the Fact triggers the ruleset named section."""
 
-        def ruleset_triggered(section, ruleset, fact):
+        def _ruleset_triggered():
             # NOTE: If more than one rule applies, we assume AND (because
             #       user can OR simply by using additional [ruleset]s).
             triggered = False
@@ -159,19 +401,19 @@ class StyleEngine(object):
             # So on 0 or 1, keep processing, but on -1 or all 0s, return False;
             # and only return True if all 1s.
 
-            trinary = probe_fact(section, ruleset, fact)
+            trinary = probe_fact(section, features)
             if trinary == -1:
                 return False
             triggered = trinary == 1 or triggered
 
-            trinary = probe_eval(section, ruleset, fact)
+            trinary = probe_eval(section, fact, features)
             if trinary == -1:
                 return False
             triggered = trinary == 1 or triggered
 
             return triggered
 
-        def probe_fact(section, ruleset, fact):
+        def probe_fact(section, features):
             # For each attribute, there are multiple rules the user can choose
             # from to specify one of more names, e.g., one or more Activity
             # names might share the same style, and user could specify:
@@ -185,90 +427,134 @@ class StyleEngine(object):
             # - But for tags, the user might want to distinguish between
             #   AND and OR, so we'll go to the trouble to let the user
             #   specify if we should AND tags, or OR them.
+            # - The rules were combined when the ruleset was compiled
+            #   (see _RulesetPredicate).
+            return self.predicates[section].probe(features)
 
-            trinary = 0
-
-            activities = set()
-            if ruleset["activity"]:
-                activities.add(ruleset["activity"])
-            if ruleset["activities"]:
-                activities = activities.union(ruleset["activities"])
-            if activities:
-                if fact.activity_name in activities:
-                    trinary = 1
-                else:
-                    return -1
-
-            categories = set()
-            if ruleset["category"]:
-                categories.add(ruleset["category"])
-            if ruleset["categories"]:
-                categories = categories.union(ruleset["categories"])
-            if categories:
-                if fact.category_name in categories:
-                    trinary = 1
-                else:
-                    return -1
-
-            # (lb): Because I'm too accommodating, a zillion ways to conditional tags.
-
-            tags_any = set()
-            if ruleset["tag"]:
-                tags_any.add(ruleset["tag"])
-            if ruleset["tags"]:
-                tags_any = tags_any.union(ruleset["tags"])
-            if ruleset["tags-any"]:
-                tags_any = tags_any.union(ruleset["tags-any"])
-            if ruleset["tags-or"]:
-                tags_any = tags_any.union(ruleset["tags-or"])
-
-            tags_all = set()
-            if ruleset["tags-all"]:
-                tags_all = tags_all.union(ruleset["tags-all"])
-            if ruleset["tags-and"]:
-                tags_all = tags_all.union(ruleset["tags-and"])
-
-            if tags_any or tags_all:
-                fact_tags = set([tag.name for tag in fact.tags])
-                if tags_any:
-                    if tags_any.intersection(fact_tags):
-                        trinary = 1
-                    else:
-                        return -1
-                if tags_all:
-                    if not tags_all.difference(fact_tags):
-                        trinary = 1
-                    else:
-                        return -1
-
-            return trinary
-
-        def probe_eval(section, ruleset, fact):
-            # (lb): `'<str>' in ruleset` sends 0, not '<str>', to __getitem__?!
-            # So do `'__eval__' not in ruleset.keys()`. Except no need, because
-            # the key should exist, because create_style_rules_object.
-            compiled_code = ruleset["__eval__"]
-            if compiled_code is None:
+        def probe_eval(section, fact, features):
+            rule_eval = self.rule_evals.get(section)
+            if rule_eval is None or rule_eval.disabled:
                 return 0
             try:
-                trinary = eval(compiled_code)
+                trinary = rule_eval(fact, features)
             except Exception as err:
-                msg = _("eval() failed on style rule ‘eval’ from “{0}”: {1}").format(
-                    section, str(err)
-                )
-                # MAYBE/2019-12-02: (lb): Show errors in Carousel?
-                # - Also one of few places where traverser imports ...helpers
-                #   (and I want to make traverser less dob-dependent (coupled)).
-                echo_warning(msg)
-                # Such that we never do this error dance again!
-                ruleset["__eval__"] = None
+                rule_eval.failures += 1
+                if not self.keep_evals:
+                    msg = _(
+                        "eval() failed on style rule ‘eval’ from “{0}”: {1}"
+                    ).format(section, str(err))
+                    disable_rule_eval(rule_eval, msg)
                 return False
+            if self.eval_budget and rule_eval.last_elapsed * 1000 > self.eval_budget:
+                rule_eval.overruns += 1
+                if not self.keep_evals:
+                    msg = _(
+                        "eval() took {0:.0f} ms on style rule ‘eval’ from “{1}”,"
+                        " over the budget of {2} ms"
+                    ).format(rule_eval.last_elapsed * 1000, section, self.eval_budget)
+                    disable_rule_eval(rule_eval, msg)
             return trinary and 1 or -1
 
+        def disable_rule_eval(rule_eval, msg):
+            # MAYBE/2019-12-02: (lb): Show errors in Carousel?
+            # - Also one of few places where traverser imports ...helpers
+            #   (and I want to make traverser less dob-dependent (coupled)).
+            echo_warning(msg)
+            # Such that we never do this error dance again!
+            rule_eval.disabled = True
+            # And forget the results that ran the disabled eval.
+            self.style_memo.clear()
+
+        if features is None:
+            features = self.fact_features(fact)
+        return _ruleset_triggered()
+
+    # ***
+
+    def process_style_rules(self, ppt_widget, friendly_name, fact):
+        # Here's an example rules.conf contents that'll get you here:
+        #   $ cat ~/.config/dob/styling/rules.conf
+        #   [My Category Style]
+        #   category_name = 'My Category'
+        #   scrollable_frame = class:my-category
+        # and then your corresponding class could be defined as:
+        #   $ cat ~/.config/dob/styling/styles.conf
+        #   [my-style]
+        #   my-category = 'bg:#CA85AC #000000'
+        # and then wire it all via the config:
+        #   $ dob config set style my-style
+
+        def _process_style_rules():
+            rulesets = rules_for_component(friendly_name)
+            if not rulesets:
+                return ""
+            custom_classes = memoized_triggered_style_classes(rulesets, fact)
+            for classes in custom_classes:
+                apply_style_rule_class(ppt_widget, classes)
+            return "".join(custom_classes)
+
         # ***
 
-        def apply_style_rule_class(ppt_widget, ruleset):
-            custom_classes = " {}".format(ruleset[friendly_name])
+        def rules_for_component(friendly_name):
+            try:
+                return self.componentry[friendly_name]
+            except KeyError:
+                return assemble_component_rulesets(friendly_name)
+
+        def assemble_component_rulesets(friendly_name):
+            rebuild_component_rulesets_list(friendly_name)
+            return self.componentry[friendly_name]
+
+        def rebuild_component_rulesets_list(friendly_name):
+            self.componentry[friendly_name] = {}
+            for section, ruleset in self.rulesets.items():
+                # The friendly_name is the name of the component in the UX.
+                # The user uses the friendly_name in the rules.conf to add
+                # a class string to the component. Check here if it's empty,
+                # meaning the user does not have this setting in their conf
+                # (and the default '' was used); or, the user specified the
+                # setting by set it to the empty string.
+                if not ruleset[friendly_name]:
+                    continue
+                if ruleset["disabled"]:
+                    continue
+                # We're just building a convenience lookup of rules that apply
+                # to the named component. We'll run the rules check later.
+                self.componentry[friendly_name][section] = ruleset
+            self.componentry_index[friendly_name] = _RulesetsIndex(
+                (section, self.predicates[section])
+                for section in self.componentry[friendly_name]
+            )
+
+        # ***
+
+        def memoized_triggered_style_classes(rulesets, fact):
+            memo_key = self.style_memo_key(friendly_name, fact)
+            if memo_key is None:
+                return triggered_style_classes(rulesets, fact)
+            custom_classes = self.style_memo_fetch(memo_key)
+            if custom_classes is None:
+                custom_classes = triggered_style_classes(rulesets, fact)
+                self.style_memo_store(memo_key, custom_classes)
+            return custom_classes
+
+        def triggered_style_classes(rulesets, fact):
+            # Returns the classes from each triggered ruleset, which are
+            # applied to the component in turn (see apply_style_rule_class).
+            custom_classes = []
+            features = self.fact_features(fact)
+            candidates = self.componentry_index[friendly_name].candidates(features)
+            for section in candidates:
+                if not self.ruleset_triggered(section, fact, features):
+                    continue
+                custom_classes.append(" {}".format(rulesets[section][friendly_name]))
+            return tuple(custom_classes)
+
+        # ***
+
+        # ***
+
+        def apply_style_rule_class(ppt_widget, custom_classes):
             if ppt_widget is None:
                 # Style being used in a (style, text, handler) tuple.
                 pass
@@ -296,7 +582,6 @@ class StyleEngine(object):
 
                 click.get_current_context().obj.affirm(False)
                 pass
-            return custom_classes
 
         def apply_style_rule_to_label(label, custom_classes):
             # (lb): I'm totally wingin' it, in the sense that this works,
@@ -0,0 +1,84 @@
+# This file exists within 'dob-bright':
+#
+#   https://github.com/tallybark/dob-bright
+#
+# Copyright © 2020 Landon Bouma. All rights reserved.
+#
+# This program is free software:  you can redistribute it  and/or  modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any later version  (GPLv3+).
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY;  without even the implied warranty of MERCHANTABILITY or  FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU  General  Public  License  for  more  details.
+#
+# If you lost the GNU General Public License that ships with this software
+# repository (read the 'LICENSE' file), see <http://www.gnu.org/licenses/>.
+
+import datetime
+import random
+
+from dob_bright.crud.fact_dressed import DirtyReasons, FactDressed
+
+
+class TestDirtyReasons(object):
+    def test_same_as_set(self):
+        """Make sure the bit flags behave like the set of reasons they replace."""
+        reasons = list(DirtyReasons.REASON_BITS) + ["plugin-reason", "other"]
+        rnd = random.Random(0)
+        dirty_reasons = DirtyReasons()
+        expected = set()
+        for _ in range(500):
+            reason = rnd.choice(reasons)
+            if rnd.random() < 0.6:
+                dirty_reasons.add(reason)
+                expected.add(reason)
+            else:
+                dirty_reasons.discard(reason)
+                expected.discard(reason)
+            assert dirty_reasons == expected
+            assert set(dirty_reasons) == expected
+            assert len(dirty_reasons) == len(expected)
+            assert all(
+                (reason in dirty_reasons) == (reason in expected) for reason in reasons
+            )
+
+    def test_fact_copy_does_not_share_reasons(self):
+        fact = FactDressed(activity=None, start=datetime.datetime(2020, 1, 1))
+        fact.dirty_reasons.add("start")
+        fact.dirty_reasons.add("plugin-reason")
+        new_fact = fact.copy()
+        new_fact.dirty_reasons.add("end")
+        new_fact.dirty_reasons.discard("plugin-reason")
+        new_fact.is_gap = True
+        assert fact.dirty_reasons == {"start", "plugin-reason"}
+        assert new_fact.dirty_reasons == {"start", "end", "interval-gap"}
+        assert not fact.is_gap
+
+
+class TestFactDressedSnapshot(object):
+    def test_snapshot_same_as_copy(self):
+        """Make sure a snapshot matches a copy, and does not see later edits."""
+        fact = FactDressed(
+            activity=None,
+            start=datetime.datetime(2020, 1, 1),
+            end=datetime.datetime(2020, 1, 2),
+            pk=1,
+            description="foo",
+            tags=["bar", "baz"],
+        )
+        fact.dirty_reasons.add("start")
+        fact.next_fact = FactDressed(activity=None, start=None)
+        snapshot = fact.snapshot()
+        assert snapshot.as_tuple() == fact.copy().as_tuple()
+        assert snapshot.orig_fact is fact
+        assert snapshot.next_fact is None
+
+        fact.end = datetime.datetime(2020, 1, 3)
+        fact.description = "edited"
+        fact.tags_replace(["qux"])
+        fact.dirty_reasons.add("end")
+        assert snapshot.end == datetime.datetime(2020, 1, 2)
+        assert snapshot.description == "foo"
+        assert sorted(tag.name for tag in snapshot.tags) == ["bar", "baz"]
+        assert snapshot.dirty_reasons == {"start"}
@@ -0,0 +1,191 @@
+# This file exists within 'dob-bright':
+#
+#   https://github.com/tallybark/dob-bright
+#
+# Copyright © 2020 Landon Bouma. All rights reserved.
+#
+# This program is free software:  you can redistribute it  and/or  modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any later version  (GPLv3+).
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY;  without even the implied warranty of MERCHANTABILITY or  FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU  General  Public  License  for  more  details.
+#
+# If you lost the GNU General Public License that ships with this software
+# repository (read the 'LICENSE' file), see <http://www.gnu.org/licenses/>.
+
+import datetime
+
+import pytest
+from nark.items.activity import Activity
+from nark.items.category import Category
+from nark.items.fact import Fact
+
+from dob_bright.crud import fix_times as fix_times_module
+from dob_bright.crud.fact_dressed import FactDressed
+from dob_bright.crud.facts_index import FactNeighbors, FactsIndex
+from dob_bright.crud.fix_times import mend_fact_timey_wimey
+
+
+class TestFactsIndex(object):
+    def save_facts(self, controller):
+        activity = Activity("Dev", category=Category("Work"))
+        # Some Facts with gaps between them, and some touching.
+        times = (
+            ((8, 0), (9, 0)),
+            ((9, 0), (9, 30)),
+            ((10, 0), (11, 15)),
+            ((13, 0), (14, 0)),
+            ((14, 0), (16, 0)),
+        )
+        for (start_hour, start_min), (end_hour, end_min) in times:
+            fact = Fact(
+                activity=activity,
+                start=datetime.datetime(2020, 1, 1, start_hour, start_min),
+                end=datetime.datetime(2020, 1, 1, end_hour, end_min),
+            )
+            controller.facts.save(fact)
+
+    def assert_same_facts(self, indexed, stored):
+        if isinstance(stored, list):
+            assert [fact.pk for fact in indexed] == [fact.pk for fact in stored]
+        else:
+            assert getattr(indexed, "pk", None) == getattr(stored, "pk", None)
+
+    @pytest.mark.parametrize("neighbors, loaded_count", ((False, 2), (True, 4)))
+    def test_lookups_match_store(
+        self, controller_with_logging, neighbors, loaded_count
+    ):
+        """Make sure the index answers like the store, inside and out of its window."""
+        controller = controller_with_logging
+        self.save_facts(controller)
+        since = datetime.datetime(2020, 1, 1, 9, 45)
+        until = datetime.datetime(2020, 1, 1, 13, 30)
+        facts_index = FactsIndex(
+            controller, since=since, until=until, neighbors=neighbors
+        )
+        # Only the Facts that overlap the window (and its neighbors) are loaded.
+        assert len(facts_index.alchemy_facts) == loaded_count
+
+        ref_time = datetime.datetime(2020, 1, 1, 7, 30)
+        while ref_time <= datetime.datetime(2020, 1, 1, 17):
+            for method in ("surrounding", "antecedent", "subsequent"):
+                args = (ref_time,) if method == "surrounding" else ()
+                kwargs = {} if method == "surrounding" else {"ref_time": ref_time}
+                self.assert_same_facts(
+                    getattr(facts_index, method)(*args, **kwargs),
+                    getattr(controller.facts, method)(*args, **kwargs),
+                )
+            probe = Fact(activity=None, start=ref_time, end=ref_time)
+            for method in ("starting_at", "ending_at", "antecedent", "subsequent"):
+                self.assert_same_facts(
+                    getattr(facts_index, method)(probe),
+                    getattr(controller.facts, method)(probe),
+                )
+            until_time = ref_time + datetime.timedelta(hours=2)
+            self.assert_same_facts(
+                facts_index.strictly_during(ref_time, until_time),
+                controller.facts.strictly_during(ref_time, until_time),
+            )
+            ref_time += datetime.timedelta(minutes=15)
+
+    def test_stored_fact_excluded(self, controller_with_logging):
+        """Make sure a stored Fact is not found to conflict with itself."""
+        controller = controller_with_logging
+        self.save_facts(controller)
+        since = datetime.datetime(2020, 1, 1, 8)
+        until = datetime.datetime(2020, 1, 1, 16)
+        facts_index = FactsIndex(controller, since=since, until=until)
+        for fact in controller.facts.get_all():
+            self.assert_same_facts(
+                facts_index.starting_at(fact), controller.facts.starting_at(fact)
+            )
+            self.assert_same_facts(
+                facts_index.ending_at(fact), controller.facts.ending_at(fact)
+            )
+            self.assert_same_facts(
+                facts_index.antecedent(fact), controller.facts.antecedent(fact)
+            )
+            self.assert_same_facts(
+                facts_index.subsequent(fact), controller.facts.subsequent(fact)
+            )
+
+    def test_neighbors_from_memory(self, controller_with_logging, mocker):
+        """Make sure the neighbors of a batch are found without asking the store."""
+        controller = controller_with_logging
+        self.save_facts(controller)
+        # A batch of new Facts in the gap between the stored Facts.
+        batch = [
+            Fact(
+                activity=None,
+                start=datetime.datetime(2020, 1, 1, 11, 30),
+                end=datetime.datetime(2020, 1, 1, 12, 0),
+            ),
+            Fact(
+                activity=None,
+                start=datetime.datetime(2020, 1, 1, 12, 0),
+                end=datetime.datetime(2020, 1, 1, 12, 30),
+            ),
+        ]
+        neighbors = FactNeighbors(controller)
+        neighbors.prefetch(batch)
+        expected = [
+            (controller.facts.antecedent(fact), controller.facts.subsequent(fact))
+            for fact in batch
+        ]
+
+        mocker.spy(controller.facts, "antecedent")
+        mocker.spy(controller.facts, "subsequent")
+        for fact, (ante_fact, seqt_fact) in zip(batch, expected):
+            self.assert_same_facts(neighbors.antecedent(fact), ante_fact)
+            self.assert_same_facts(neighbors.subsequent(fact), seqt_fact)
+        assert controller.facts.antecedent.call_count == 0
+        assert controller.facts.subsequent.call_count == 0
+
+        # After the store changes, the neighbors are loaded again.
+        ante_fact = expected[0][0]
+        ante_fact.end = datetime.datetime(2020, 1, 1, 11, 20)
+        controller.facts.save(ante_fact)
+        neighbors.invalidate()
+        assert neighbors.antecedent(batch[0]).end == ante_fact.end
+
+    def test_neighbors_see_saved_batch(self, controller_with_logging, mocker):
+        """Make sure each mended Fact is seen by the next Fact in the batch."""
+        controller = controller_with_logging
+        # Stop at the conflict report header, before it prints the Facts.
+        mocker.patch.object(
+            fix_times_module, "echo_block_header", side_effect=SystemExit
+        )
+        activity = Activity("Dev", category=Category("Work"))
+
+        def new_fact(line_num, start_hour, end_hour):
+            return FactDressed(
+                activity=activity,
+                start=datetime.datetime(2020, 1, 1, start_hour, 0),
+                end=datetime.datetime(2020, 1, 1, end_hour, 0),
+                line_num=line_num,
+                line_raw="{}:00 to {}:00: Dev@Work".format(start_hour, end_hour),
+            )
+
+        # A stored Fact after the batch, which the window loads as a neighbor.
+        controller.facts.save(new_fact(0, 13, 14))
+        # Two adjacent Facts that do not conflict, then one overlapping the first.
+        batch = [new_fact(1, 10, 11), new_fact(2, 11, 12), new_fact(3, 9, 11)]
+        neighbors = FactNeighbors(controller)
+        neighbors.prefetch(batch)
+        for fact in batch[:2]:
+            new_facts, conflicts = mend_fact_timey_wimey(
+                controller, fact, "verify_both", neighbors=neighbors
+            )
+            assert conflicts == []
+            for mended_fact in new_facts:
+                controller.facts.save(mended_fact)
+        # The window knows about the saved Facts,
+        ref_time = datetime.datetime(2020, 1, 1, 9, 0)
+        assert neighbors.subsequent(ref_time=ref_time).start == batch[0].start
+        # and the Fact that overlaps the first is caught.
+        with pytest.raises(SystemExit):
+            mend_fact_timey_wimey(
+                controller, batch[2], "verify_both", neighbors=neighbors
+            )
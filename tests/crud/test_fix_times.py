@@ -0,0 +1,155 @@
+# This file exists within 'dob-bright':
+#
+#   https://github.com/tallybark/dob-bright
+#
+# Copyright © 2020 Landon Bouma. All rights reserved.
+#
+# This program is free software:  you can redistribute it  and/or  modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any later version  (GPLv3+).
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY;  without even the implied warranty of MERCHANTABILITY or  FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU  General  Public  License  for  more  details.
+#
+# If you lost the GNU General Public License that ships with this software
+# repository (read the 'LICENSE' file), see <http://www.gnu.org/licenses/>.
+
+import datetime
+import random
+
+import pytest
+from nark.items.fact import Fact
+
+from dob_bright.crud.fact_dressed import FactDressed
+from dob_bright.crud.fix_times import (
+    must_complete_times,
+    resolve_overlapping,
+    resolve_overlapping_bulk,
+)
+
+
+class TestMustCompleteTimes(object):
+    def new_fact(self, start, end, description="foo"):
+        fact = Fact(activity=None, start=None, end=None, description=description)
+        fact.start = start
+        fact.end = end
+        return fact
+
+    def test_relative_times(self, controller_with_logging):
+        """Make sure clock, delta, and blank times are resolved from their peers."""
+        controller = controller_with_logging
+        new_facts = [
+            self.new_fact(datetime.datetime(2020, 1, 1, 8), "09:00"),
+            self.new_fact(None, "+30"),
+            # The end is relative to the next known datetime, a few Facts later.
+            self.new_fact(None, "-15"),
+            self.new_fact("11:00", None),
+            self.new_fact(datetime.datetime(2020, 1, 1, 12), "13:00"),
+        ]
+        conflicts = must_complete_times(controller, new_facts, suppress_barf=True)
+        assert not conflicts
+        assert [(fact.start.time(), fact.end.time()) for fact in new_facts] == [
+            (datetime.time(8), datetime.time(9)),
+            (datetime.time(9), datetime.time(9, 30)),
+            (datetime.time(9, 30), datetime.time(10, 45)),
+            (datetime.time(11), datetime.time(12)),
+            (datetime.time(12), datetime.time(13)),
+        ]
+
+
+class TestResolveOverlappingBulk(object):
+    base_time = datetime.datetime(2020, 1, 1)
+
+    def at(self, minute):
+        return self.base_time + datetime.timedelta(minutes=minute)
+
+    def random_facts(self, rnd, count, ongoing=False):
+        # Use a coarse grid of times, so that edges often touch, and
+        # include some momentaneous Facts.
+        facts = []
+        minute = rnd.randrange(5)
+        for idx in range(count):
+            start = minute
+            minute += rnd.choice((0, 1, 1, 2, 3, 5))
+            fact = FactDressed(activity=None, start=self.at(start), end=self.at(minute))
+            facts.append(fact)
+            minute += rnd.choice((0, 0, 1, 2))
+        if ongoing and facts:
+            facts[-1].end = None
+        return facts
+
+    def resolve_one_at_a_time(self, new_facts, stored_facts, allow_momentaneous):
+        # Call resolve_overlapping for each new Fact, and "save" its edits
+        # before the next call, giving new pieces new PKs.
+        stored = {fact.pk: fact for fact in stored_facts}
+        lineage = {fact.pk: fact.pk for fact in stored_facts}
+        # The original of each stored Fact, from the first call that edits it.
+        originals = {}
+        next_pk = max(stored) + 1
+        for fact in new_facts:
+            conflicts = sorted(stored.values(), key=lambda fact: fact.pk)
+            resolved = resolve_overlapping(
+                fact, conflicts, allow_momentaneous=allow_momentaneous
+            )
+            for edited, original in resolved:
+                if original.pk in lineage and original.pk == lineage[original.pk]:
+                    originals.setdefault(original.pk, self.times(original))
+                if edited.pk is None:
+                    edited.pk = next_pk
+                    lineage[next_pk] = lineage[edited.split_from]
+                    next_pk += 1
+                if edited.deleted:
+                    del stored[edited.pk]
+                else:
+                    stored[edited.pk] = edited
+        return self.timeline(stored.values(), lineage), originals
+
+    def times(self, fact):
+        return (fact.start, fact.end, fact.deleted)
+
+    def timeline(self, facts, lineage):
+        pieces = {}
+        for fact in facts:
+            pieces.setdefault(lineage[fact.pk], []).append((fact.start, fact.end))
+        return {pk: sorted(intervals) for pk, intervals in pieces.items()}
+
+    @pytest.mark.parametrize("allow_momentaneous", (False, True))
+    def test_same_as_one_at_a_time(self, allow_momentaneous):
+        """Make sure the bulk resolver edits stored Facts like the per-Fact one."""
+        for seed in range(250):
+            rnd = random.Random(seed)
+            stored_facts = self.random_facts(
+                rnd, rnd.randrange(1, 8), rnd.random() < 0.3
+            )
+            for pk, fact in enumerate(stored_facts, start=1):
+                fact.pk = pk
+            new_facts = self.random_facts(rnd, rnd.randrange(1, 8))
+            stored_copies = [fact.copy() for fact in stored_facts]
+            new_copies = [fact.copy() for fact in new_facts]
+
+            expected, expected_originals = self.resolve_one_at_a_time(
+                new_copies, stored_copies, allow_momentaneous
+            )
+
+            resolved = resolve_overlapping_bulk(
+                new_facts, stored_facts, allow_momentaneous=allow_momentaneous
+            )
+            originals = {original.pk: original for _edited, original in resolved}
+            survivors = [fact for fact in stored_facts if fact.pk not in originals]
+            survivors += [
+                edited for edited, _original in resolved if not edited.deleted
+            ]
+            lineage = {fact.pk: fact.pk for fact in stored_facts}
+            for edited in survivors:
+                if edited.pk is None:
+                    edited.pk = -len(lineage)
+                    lineage[edited.pk] = edited.split_from
+            assert self.timeline(survivors, lineage) == expected, seed
+            # Each stored Fact is listed with a single copy of its original,
+            # from before any edits, like the per-Fact resolver's.
+            for edited, original in resolved:
+                assert original is originals[original.pk]
+            assert {
+                pk: self.times(original) for pk, original in originals.items()
+            } == expected_originals, seed
@@ -0,0 +1,247 @@
+# This file exists within 'dob-bright':
+#
+#   https://github.com/tallybark/dob-bright
+#
+# Copyright © 2020 Landon Bouma. All rights reserved.
+#
+# This program is free software:  you can redistribute it  and/or  modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any later version  (GPLv3+).
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY;  without even the implied warranty of MERCHANTABILITY or  FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU  General  Public  License  for  more  details.
+#
+# If you lost the GNU General Public License that ships with this software
+# repository (read the 'LICENSE' file), see <http://www.gnu.org/licenses/>.
+
+import datetime
+import io
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from dob_bright.crud import parse_input as parse_input_module
+from dob_bright.crud.mapped_input import MappedInput
+from dob_bright.crud.parse_input import (
+    PARALLEL_PARSE_CHUNKSIZE,
+    PARALLEL_PARSE_MIN_LINES,
+    RE_TIME_HINT,
+    _dissect_meta_line,
+    _line_could_start_fact,
+    match_time_hint,
+    parse_input,
+)
+
+IMPORT_TEXT = """
+2020-01-01 08:00: Dev@Work: First Fact.
+
+at 09:00: Dev@Work: Clock time.
+More description.
+
+to 09:30: Meet@Work: Ends relative.
+
++20: Lunch@Home: Delta.
+
+2020-01-01 12:00 to 13:00: Dev@Work: Both.
+
+13:10: Dev@Work: Blank end, filled in from next.
+
+2020-01-01 14:00: Dev@Work: Last.
+"""
+
+
+class TestParseInput(object):
+    def fact_times(self, facts):
+        return [(fact.start, fact.end, fact.description) for fact in facts]
+
+    @pytest.mark.parametrize("window_size", (1, 2, 3))
+    def test_windows_match_whole_import(self, controller_with_logging, window_size):
+        """Make sure importing in windows produces the same Facts as all at once."""
+        controller = controller_with_logging
+        new_facts = parse_input(controller, io.StringIO(IMPORT_TEXT))
+        windows = list(
+            parse_input(controller, io.StringIO(IMPORT_TEXT), window_size=window_size)
+        )
+        assert len(windows) > 1
+        assert self.fact_times(
+            [fact for window in windows for fact in window]
+        ) == self.fact_times(new_facts)
+
+    def test_mapped_file_matches_stream(self, controller_with_logging, tmpdir):
+        """Make sure importing a (memory-mapped) file matches reading a stream."""
+        controller = controller_with_logging
+        import_path = tmpdir.join("import.txt")
+        import_path.write(IMPORT_TEXT)
+        new_facts = parse_input(controller, io.StringIO(IMPORT_TEXT))
+        with open(import_path, "r") as file_in:
+            mapped_facts = parse_input(controller, file_in)
+        assert self.fact_times(mapped_facts) == self.fact_times(new_facts)
+
+    @pytest.mark.parametrize("window_size", (0, 2))
+    def test_mapped_file_closed(
+        self, controller_with_logging, tmpdir, monkeypatch, window_size
+    ):
+        """Make sure the file is unmapped once its Facts are hydrated."""
+        controller = controller_with_logging
+        import_path = tmpdir.join("import.txt")
+        import_path.write(IMPORT_TEXT)
+        mapped_inputs = []
+        open_maybe = MappedInput.open_maybe
+
+        def record_open_maybe(file_in):
+            mapped_input = open_maybe(file_in)
+            mapped_inputs.append(mapped_input)
+            return mapped_input
+
+        monkeypatch.setattr(MappedInput, "open_maybe", record_open_maybe)
+        with open(import_path, "r") as file_in:
+            new_facts = parse_input(controller, file_in, window_size=window_size)
+            if window_size:
+                new_facts = [fact for window in new_facts for fact in window]
+            assert not file_in.closed
+        assert new_facts
+        assert len(mapped_inputs) == 1
+        assert mapped_inputs[0].closed
+
+
+class TestParseInputParallel(object):
+    # More Facts than it takes to start the process pool, and not
+    # a multiple of the chunk size, so the final chunk is partial.
+    n_facts = PARALLEL_PARSE_MIN_LINES + PARALLEL_PARSE_CHUNKSIZE + 5
+
+    def import_text(self, bad_line_at=None):
+        lines = []
+        start = datetime.datetime(2020, 1, 1)
+        for idx in range(self.n_facts):
+            end = start + datetime.timedelta(minutes=10)
+            if idx == bad_line_at:
+                # A date without a time of day, which the parser warns about.
+                lines.append("{:%Y-%m-%d} 830: Dev@Work: Fact {}\n".format(start, idx))
+            else:
+                lines.append(
+                    "{:%Y-%m-%d %H:%M} to {:%H:%M}: Dev@Work: Fact {}\n".format(
+                        start, end, idx
+                    )
+                )
+            lines.append("\n")
+            start = end
+        return "".join(lines)
+
+    def parse(self, controller, text, jobs, mocker):
+        executor = mocker.patch.object(
+            parse_input_module, "ProcessPoolExecutor", wraps=ProcessPoolExecutor
+        )
+        new_facts = parse_input(controller, io.StringIO(text), jobs=jobs)
+        assert executor.called == (jobs != 1)
+        return [(fact.start, fact.end, fact.description) for fact in new_facts]
+
+    def test_parallel_matches_serial(self, controller_with_logging, mocker):
+        """Make sure parsing in a process pool yields the same Facts, in order."""
+        controller = controller_with_logging
+        text = self.import_text()
+        serial_facts = self.parse(controller, text, 1, mocker)
+        assert len(serial_facts) == self.n_facts
+        assert self.parse(controller, text, 2, mocker) == serial_facts
+
+    def test_parallel_reports_same_errors(
+        self, controller_with_logging, mocker, capsys
+    ):
+        """Make sure a malformed line mid-chunk is reported as in a serial parse."""
+        controller = controller_with_logging
+        # Somewhere in the middle of the third chunk.
+        text = self.import_text(bad_line_at=PARALLEL_PARSE_CHUNKSIZE * 2 + 7)
+        # Skip the (randomly chosen) ASCII art, and just exit.
+        mocker.patch.object(
+            parse_input_module, "exit_warning_crude", side_effect=SystemExit
+        )
+        outputs = []
+        for jobs in (1, 2):
+            with pytest.raises(SystemExit):
+                self.parse(controller, text, jobs, mocker)
+            outputs.append(capsys.readouterr())
+        assert "missing the time of day" in outputs[0].out
+        assert "Fact {}".format(PARALLEL_PARSE_CHUNKSIZE * 2 + 7) in outputs[0].out
+        assert outputs[1] == outputs[0]
+
+
+class TestLineCouldStartFact(object):
+    @pytest.mark.parametrize(
+        "line",
+        (
+            # Relative offsets.
+            "-10: Dev@Work: Relative to the next Fact.",
+            "+20: Dev@Work: Relative to the previous Fact.",
+            # Clock times.
+            "08:00: Dev@Work: Clock time.",
+            "0800: Dev@Work: Military time.",
+            # ISO dates.
+            "2020-01-01 08:00: Dev@Work: ISO date.",
+            "2020-01-01T08:00:00 to 2020-01-01 09:00: Dev@Work: ISO dates.",
+            # Friendly datetimes, which are only found ahead of the '@'.
+            "yesterday at 3 PM, Dev@Work: Friendly time.",
+            "@Work: Just the actegory.",
+            # Time hints.
+            "at 08:00: Dev@Work: Start hint.",
+            "from 08:00 to 09:00: Dev@Work: Both hint.",
+            "until 09:00: Dev@Work: End hint.",
+            "then: Dev@Work: Then hint.",
+            "after: Dev@Work: After hint.",
+            # Leading whitespace.
+            "  2020-01-01 08:00: Dev@Work: Indented.",
+            "\t+5: Dev@Work: Tabbed.",
+        ),
+    )
+    def test_accepts_fact_start(self, line):
+        """Make sure the prefilter does not skip any line that might start a Fact."""
+        assert _line_could_start_fact(line + "\n")
+
+    @pytest.mark.parametrize(
+        "line",
+        (
+            "Just a description line.",
+            "More description.",
+            "Meeting notes: nothing to report.",
+            "Lunch with Sam, it was fine.",
+            "#tag-only line",
+        ),
+    )
+    def test_rejects_description(self, line):
+        """Make sure the prefilter skips description lines (as does the parser)."""
+        assert not _line_could_start_fact(line + "\n")
+        fact_dict = _dissect_meta_line(line + "\n")[0]
+        assert not fact_dict["start"] and not fact_dict["end"]
+
+
+class TestMatchTimeHint(object):
+    HINTS = (
+        ("from 08:00 to 09:00: Dev@Work", "verify_both", "08:00 to 09:00: Dev@Work"),
+        ("between 08:00 and 09:00", "verify_both", "08:00 and 09:00"),
+        ("at 08:00: Dev@Work", "verify_start", "08:00: Dev@Work"),
+        ("AT 08:00: Dev@Work", "verify_start", "08:00: Dev@Work"),
+        ("to 09:00: Dev@Work", "verify_end", "09:00: Dev@Work"),
+        ("until 09:00: Dev@Work", "verify_end", "09:00: Dev@Work"),
+        ("then: Dev@Work", "verify_then_none", "Dev@Work"),
+        ("then 10m: Dev@Work", "verify_then_some", "10m: Dev@Work"),
+        ("still: Dev@Work", "verify_still_none", "Dev@Work"),
+        ("still 10m: Dev@Work", "verify_still_some", "10m: Dev@Work"),
+        ("after: Dev@Work", "verify_after", "Dev@Work"),
+        ("since: Dev@Work", "verify_after", "Dev@Work"),
+        ("next: Dev@Work", "verify_after", "Dev@Work"),
+    )
+
+    @pytest.mark.parametrize("line, hint, remainder", HINTS)
+    def test_hint_and_offset(self, line, hint, remainder):
+        """Make sure each time hint group is named, and the offset ends it."""
+        sussed_hint, hint_end = match_time_hint(line)
+        assert sussed_hint == hint
+        assert line[hint_end:].lstrip() == remainder
+
+    def test_no_hint(self):
+        """Make sure a line without a time hint returns no hint."""
+        assert match_time_hint("2020-01-01 08:00: Dev@Work") == ("", 0)
+        assert match_time_hint("Just a description line.") == ("", 0)
+
+    def test_every_group_tested(self):
+        """Make sure the cases above cover every group in RE_TIME_HINT."""
+        assert set(RE_TIME_HINT.groupindex) == set(hint for _, hint, _ in self.HINTS)
@@ -0,0 +1,191 @@
+# This file exists within 'dob-bright':
+#
+#   https://github.com/tallybark/dob-bright
+#
+# Copyright © 2020 Landon Bouma. All rights reserved.
+#
+# 'dob' is free software: you can redistribute it and/or modify it under the terms
+# of the GNU General Public License  as  published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any   later    version.
+#
+# 'dob' is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY  or  FITNESS FOR A PARTICULAR
+# PURPOSE.  See  the  GNU General Public License  for  more details.
+#
+# You can find the GNU General Public License reprinted in the file titled 'LICENSE',
+# or visit <http://www.gnu.org/licenses/>.
+
+import datetime
+
+import pytest
+from nark.items.activity import Activity
+from nark.items.category import Category
+from nark.items.fact import Fact
+from nark.items.tag import Tag
+from nark.managers.query_terms import QueryTerms
+
+from dob_bright.reports import report_cache as report_cache_module
+from dob_bright.reports.render_results import render_results
+from dob_bright.reports.report_cache import DailyTotalsCache
+from dob_bright.reports.tabulate_results import tabulate_results
+
+
+class TestDailyTotalsCache(object):
+    def save_facts(self, controller):
+        for day, hour, act_name, tag_names in (
+            (1, 8, "Dev", ["foo"]),
+            (1, 9, "Meet", ["foo", "bar"]),
+            (2, 8, "Dev", []),
+            (3, 8, "Dev", ["foo"]),
+        ):
+            start = datetime.datetime(2020, 1, day, hour)
+            fact = Fact(
+                activity=Activity(act_name, category=Category("Work")),
+                start=start,
+                end=start + datetime.timedelta(minutes=30),
+                tags=[Tag(name) for name in tag_names],
+            )
+            controller.facts.save(fact)
+
+    def test_daily_totals(self, controller_with_logging, tmpdir):
+        """Make sure the daily totals are tallied, cached, and reloaded."""
+        controller = controller_with_logging
+        self.save_facts(controller)
+        cache_path = str(tmpdir.join("report-cache.json"))
+
+        daily_totals = DailyTotalsCache(controller, cache_path).daily_totals()
+        assert list(daily_totals.keys()) == [
+            datetime.date(2020, 1, day) for day in (1, 2, 3)
+        ]
+        assert daily_totals[datetime.date(2020, 1, 1)].group_count == 2
+        assert daily_totals[datetime.date(2020, 1, 1)].amassed_tags["foo"].freq == 2
+        assert daily_totals[datetime.date(2020, 1, 1)].amassed_tags["bar"].freq == 1
+
+        # A new cache object reads the saved totals, and does not tally any Facts.
+        cache = DailyTotalsCache(controller, cache_path)
+        cache.tally_days = None
+        gross_totals = cache.gross_totals()
+        assert gross_totals.group_count == 4
+        assert gross_totals.cum_duration * 24 == pytest.approx(2.0)
+        assert gross_totals.first_start == datetime.datetime(2020, 1, 1, 8)
+
+    def test_daily_totals_stale_day(self, controller_with_logging, tmpdir, mocker):
+        """Make sure a day whose Facts change is tallied again, and only that day."""
+        controller = controller_with_logging
+        self.save_facts(controller)
+        cache_path = str(tmpdir.join("report-cache.json"))
+        DailyTotalsCache(controller, cache_path).daily_totals()
+
+        fact = controller.facts.get_all()[-1]
+        fact.end += datetime.timedelta(minutes=30)
+        controller.facts.save(fact)
+
+        cache = DailyTotalsCache(controller, cache_path)
+        mocker.spy(cache, "tally_days")
+        daily_totals = cache.daily_totals()
+        cache.tally_days.assert_called_once_with(["2020-01-03"])
+        assert daily_totals[
+            datetime.date(2020, 1, 3)
+        ].cum_duration * 24 == pytest.approx(1.0)
+
+    def test_daily_totals_renamed_tag(self, controller_with_logging, tmpdir):
+        """Make sure the cached totals use the current Tag and Activity names."""
+        controller = controller_with_logging
+        self.save_facts(controller)
+        cache_path = str(tmpdir.join("report-cache.json"))
+        DailyTotalsCache(controller, cache_path).daily_totals()
+
+        tag = controller.tags.get_by_name("foo")
+        tag.name = "baz"
+        controller.tags.save(tag)
+        activity = controller.activities.get_by_composite(
+            "Meet", controller.categories.get_by_name("Work")
+        )
+        activity.name = "Sync"
+        controller.activities.save(activity)
+
+        cache = DailyTotalsCache(controller, cache_path)
+        cache.tally_days = None
+        daily_totals = cache.daily_totals()
+        assert set(daily_totals[datetime.date(2020, 1, 1)].amassed_tags) == set(
+            ["bar", "baz"]
+        )
+        results = cache.daily_results()
+        assert results[0][-3] == set(["Dev@Work", "Sync@Work"])
+
+    def test_gather_results_matches_store(self, controller_with_logging, tmpdir):
+        """Make sure a daily report from the cache matches one from the store."""
+        controller = controller_with_logging
+        self.save_facts(controller)
+        cache_path = str(tmpdir.join("report-cache.json"))
+        query_terms = QueryTerms(
+            group_days=True,
+            include_stats=True,
+            since=datetime.datetime(2020, 1, 1),
+            sort_cols=["day"],
+            sort_orders=["desc"],
+        )
+
+        def tabulate_journal(results):
+            return tabulate_results(
+                controller,
+                results,
+                query_terms=query_terms,
+                output_format="journal",
+                show_totals=True,
+            ).table
+
+        expect_table = tabulate_journal(
+            controller.facts.get_all(query_terms=query_terms)
+        )
+        # Once to tally the days, and again to read them from the cache file.
+        for _ in range(2):
+            cache = DailyTotalsCache(controller, cache_path)
+            assert cache.can_gather(query_terms)
+            assert tabulate_journal(cache.gather_results(query_terms)) == expect_table
+            cache.tally_days = None
+
+    def test_render_results_gathers_from_cache(
+        self, controller_with_logging, tmpdir, mocker
+    ):
+        """Make sure render_results uses the cache when not passed the results."""
+        controller = controller_with_logging
+        self.save_facts(controller)
+        cache_path = str(tmpdir.join("report-cache.json"))
+        mocker.patch.object(
+            report_cache_module, "_report_cache_path", return_value=cache_path
+        )
+        mocker.spy(DailyTotalsCache, "daily_results")
+        query_terms = QueryTerms(
+            group_days=True,
+            include_stats=True,
+            sort_cols=["day"],
+        )
+
+        def render_journal(results, basename):
+            output_path = str(tmpdir.join(basename))
+            render_results(
+                controller,
+                results,
+                query_terms=query_terms,
+                output_format="journal",
+                output_obj_or_path=output_path,
+                show_totals=True,
+            )
+            with open(output_path) as output_f:
+                return output_f.read()
+
+        expect_report = render_journal(
+            controller.facts.get_all(query_terms=query_terms), "expect.txt"
+        )
+        assert DailyTotalsCache.daily_results.call_count == 0
+        assert render_journal(None, "cached.txt") == expect_report
+        assert DailyTotalsCache.daily_results.call_count == 1
+
+        # Queries the cache cannot answer are fetched from the store.
+        query_terms.group_days = False
+        expect_report = render_journal(
+            controller.facts.get_all(query_terms=query_terms), "expect.txt"
+        )
+        assert render_journal(None, "fetched.txt") == expect_report
+        assert DailyTotalsCache.daily_results.call_count == 1
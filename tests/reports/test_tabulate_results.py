@@ -15,7 +15,9 @@
 # You can find the GNU General Public License reprinted in the file titled 'LICENSE',
 # or visit <http://www.gnu.org/licenses/>.
 
-from dob_bright.reports.tabulate_results import tabulate_results
+from nark.managers.query_terms import QueryTerms
+
+from dob_bright.reports.tabulate_results import _GrossTotals, tabulate_results
 
 
 class TestGenerateTable(object):
@@ -34,3 +36,101 @@ class TestGenerateTable(object):
         # creates a table with the 8 following columns:
         #   key, start, end, activity, category, tags, description, duration
         assert len(tabulation.repcols) == 8
+
+    def test_generate_table_streaming(self, controller_with_logging, fact):
+        """Make sure a streaming table yields the same rows as a buffered one."""
+        controller = controller_with_logging
+        buffered = tabulate_results(controller, [fact])
+        streamed = tabulate_results(controller, [fact], streaming=True)
+        assert not isinstance(streamed.table, list)
+        assert list(streamed.table) == buffered.table
+        assert streamed.repcols == buffered.repcols
+
+    def test_generate_table_streaming_buffers_journal(
+        self, controller_with_logging, fact
+    ):
+        """Make sure a journal table is buffered, because it tracks widths."""
+        controller = controller_with_logging
+        tabulation = tabulate_results(
+            controller, [fact], output_format="journal", streaming=True
+        )
+        assert isinstance(tabulation.table, list)
+        assert tabulation.max_widths[0] > 0
+
+    def test_generate_table_track_widths_columns(self, controller_with_logging, fact):
+        """Make sure only the requested columns' widths are tracked."""
+        controller = controller_with_logging
+        tabulation = tabulate_results(controller, [fact], track_widths=["activity"])
+        assert tabulation.max_widths.activity == len(fact.activity.name)
+        assert tabulation.max_widths.start == -1
+        assert tabulation.max_widths.description == -1
+
+    def test_generate_table_custom_columns(self, controller_with_logging, fact):
+        """Make sure the table contains just the custom columns, in order."""
+        controller = controller_with_logging
+        tabulation = tabulate_results(
+            controller, [fact], custom_columns=["tags", "key", "activity"]
+        )
+        assert tabulation.table[0]._fields == ("tags", "key", "activity")
+        assert tabulation.table[0].key == fact.pk
+        assert tabulation.table[0].activity == fact.activity.name
+
+    def test_generate_table_re_sort_mixed_orders(
+        self, controller_with_logging, fact_factory
+    ):
+        """Make sure re-sorting on columns with different directions works."""
+        controller = controller_with_logging
+        facts = [
+            fact_factory(description="b"),
+            fact_factory(description="a"),
+            fact_factory(description="b"),
+        ]
+        facts[0].pk, facts[1].pk, facts[2].pk = 1, 2, 3
+        query_terms = QueryTerms(
+            sort_cols=["name", "fact"], sort_orders=["asc", "desc"]
+        )
+        tabulation = tabulate_results(
+            controller, facts, query_terms=query_terms, re_sort=True
+        )
+        assert [row.key for row in tabulation.table] == [2, 3, 1]
+
+    def test_generate_table_re_sort_row_limit(
+        self, controller_with_logging, fact_factory
+    ):
+        """Make sure the row_limit rows are the top rows after re-sorting."""
+        controller = controller_with_logging
+        facts = [fact_factory(description=desc) for desc in ("c", "b", "d", "a")]
+        query_terms = QueryTerms(sort_cols=["name"])
+        tabulation = tabulate_results(
+            controller, facts, row_limit=2, query_terms=query_terms, re_sort=True
+        )
+        assert [row.description for row in tabulation.table] == ["a", "b"]
+
+
+class TestGrossTotals(object):
+    def test_merge_matches_updating_all_at_once(self, fact_factory):
+        """Make sure merged totals equal totals tallied in one go."""
+        facts = [fact_factory() for _ in range(3)]
+
+        def tally(tally_facts):
+            gross_totals = _GrossTotals()
+            for fact in tally_facts:
+                gross_totals.update_durations(fact.delta().total_seconds())
+                gross_totals.update_group_count(1)
+                gross_totals.update_first_and_final(fact.start, fact.end)
+                gross_totals.update_amassed_tags(fact.tags)
+            return gross_totals
+
+        expect = tally(facts)
+        merged = tally(facts[:1]).merge(tally([]).merge(tally(facts[1:])))
+        for attr in (
+            "cum_duration",
+            "max_duration",
+            "group_count",
+            "first_start",
+            "final_end",
+        ):
+            assert getattr(merged, attr) == getattr(expect, attr)
+        assert {name: tag.freq for name, tag in merged.amassed_tags.items()} == {
+            name: tag.freq for name, tag in expect.amassed_tags.items()
+        }
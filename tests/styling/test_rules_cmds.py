@@ -0,0 +1,75 @@
+# This file exists within 'dob-bright':
+#
+#   https://github.com/tallybark/dob-bright
+#
+# Copyright © 2020 Landon Bouma. All rights reserved.
+#
+# This program is free software:  you can redistribute it  and/or  modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any later version  (GPLv3+).
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY;  without even the implied warranty of MERCHANTABILITY or  FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU  General  Public  License  for  more  details.
+#
+# If you lost the GNU General Public License that ships with this software
+# repository (read the 'LICENSE' file), see <http://www.gnu.org/licenses/>.
+
+import datetime
+
+from nark.items.activity import Activity
+from nark.items.category import Category
+from nark.items.fact import Fact
+
+from dob_bright.styling import rules_cmds
+from dob_bright.styling.rules_cmds import echo_rules_profile
+from dob_bright.styling.style_engine import compile_rule_eval
+
+from .test_style_engine import create_rules_confobj
+
+
+class TestEchoRulesProfile(object):
+    def save_facts(self, controller):
+        for hour, activity_name in ((8, "Dev"), (9, "Dev"), (10, "Test")):
+            start = datetime.datetime(2020, 1, 1, hour)
+            fact = Fact(
+                activity=Activity(activity_name, category=Category("Work")),
+                start=start,
+                end=start + datetime.timedelta(minutes=30),
+            )
+            controller.facts.save(fact)
+
+    def test_profile_counts(self, controller_with_logging, mocker):
+        """Make sure each rule's matches, eval failures and overruns are counted."""
+        controller = controller_with_logging
+        controller.config["editor.rules_eval_budget"] = 1
+        self.save_facts(controller)
+        rules = {
+            "dev": {"activity": "Dev", "title-normal": "class:dev"},
+            "broken": {
+                "__eval__": compile_rule_eval("fact.no_such_attr"),
+                "title-normal": "class:broken",
+            },
+            "slow": {
+                "__eval__": compile_rule_eval("__import__('time').sleep(0.005) or 1"),
+                "title-normal": "class:slow",
+            },
+            "work": {"category": "Work", "title-normal": "class:work"},
+        }
+        mocker.patch.object(
+            rules_cmds, "load_style_rules", return_value=create_rules_confobj(rules)
+        )
+        echo_warning = mocker.patch.object(rules_cmds, "echo_warning")
+        render_results = mocker.patch.object(rules_cmds, "render_results")
+        echo_rules_profile(controller)
+        results = render_results.call_args.kwargs["results"]
+        counts = {row[0]: (row[2], row[3], row[6], row[7]) for row in results}
+        # The evals are never disabled, so each is run (and fails) for every Fact.
+        assert counts == {
+            "dev": (2, 3, 0, 0),
+            "broken": (0, 3, 3, 0),
+            "slow": (3, 3, 0, 3),
+            "work": (3, 3, 0, 0),
+        }
+        assert render_results.call_args.kwargs["headers"][-1] == "Over 1 ms"
+        echo_warning.assert_not_called()
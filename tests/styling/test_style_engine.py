@@ -0,0 +1,222 @@
+# This file exists within 'dob-bright':
+#
+#   https://github.com/tallybark/dob-bright
+#
+# Copyright © 2020 Landon Bouma. All rights reserved.
+#
+# This program is free software:  you can redistribute it  and/or  modify it under the
+# terms of the GNU General Public License as published by the Free Software Foundation,
+# either version 3  of the License,  or  (at your option)  any later version  (GPLv3+).
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY;  without even the implied warranty of MERCHANTABILITY or  FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU  General  Public  License  for  more  details.
+#
+# If you lost the GNU General Public License that ships with this software
+# repository (read the 'LICENSE' file), see <http://www.gnu.org/licenses/>.
+
+import datetime
+import random
+
+import pytest
+from configobj import ConfigObj
+from nark.items.activity import Activity
+from nark.items.category import Category
+from prompt_toolkit.widgets.base import Label
+
+from dob_bright.crud.fact_dressed import FactDressed
+from dob_bright.styling.load_styling import load_style_engine
+from dob_bright.styling.style_engine import StyleEngine, compile_rule_eval
+
+
+def create_rules_confobj(rules):
+    rules_confobj = ConfigObj()
+    rules_confobj.filename = "rules.conf"
+    for section, rule in rules.items():
+        rules_confobj[section] = rule
+    return rules_confobj
+
+
+def create_fact(activity_name, category_name, tags=None, description=None):
+    activity = Activity(name=activity_name, category=Category(name=category_name))
+    return FactDressed(
+        activity=activity,
+        start=datetime.datetime(2020, 1, 1),
+        end=datetime.datetime(2020, 1, 1, 1),
+        tags=tags,
+        description=description,
+    )
+
+
+RULES = {
+    "by-activity": {
+        "activity": "Dev",
+        "activities": ["Test"],
+        "title-normal": "class:a",
+    },
+    "by-category": {"category": "Work", "title-normal": "class:c"},
+    "by-both": {"activity": "Dev", "category": "Home", "title-normal": "class:b"},
+    "tags-any": {"tag": "foo", "tags-or": ["bar"], "title-normal": "class:ta"},
+    "tags-all": {"tags-all": ["foo"], "tags-and": ["bar"], "title-normal": "class:tl"},
+    "no-conditions": {"title-normal": "class:none"},
+    "disabled": {"disabled": True, "category": "Work", "title-normal": "class:d"},
+    "other-component": {"category": "Work", "streamer": "class:s"},
+}
+
+
+class TestStyleEngine(object):
+    def test_process_style_rules(self):
+        """Make sure each ruleset's conditions are ANDed, and their names ORed."""
+        engine = StyleEngine(create_rules_confobj(RULES))
+
+        def classes(fact):
+            return engine.process_style_rules(None, "title-normal", fact).split()
+
+        assert classes(create_fact("Dev", "Work")) == ["class:a", "class:c"]
+        assert classes(create_fact("Test", "Home")) == ["class:a"]
+        assert classes(create_fact("Dev", "Home")) == ["class:a", "class:b"]
+        assert classes(create_fact("Play", "Home", ["bar"])) == ["class:ta"]
+        assert classes(create_fact("Play", "Home", ["foo", "bar"])) == [
+            "class:ta",
+            "class:tl",
+        ]
+
+    def test_edited_fact_restyled(self):
+        engine = StyleEngine(create_rules_confobj(RULES))
+        fact = create_fact("Play", "Home")
+        assert not engine.process_style_rules(None, "title-normal", fact)
+        fact.tags_replace(["foo"])
+        assert engine.process_style_rules(None, "title-normal", fact) == " class:ta"
+        fact.activity = Activity(name="Dev", category=Category(name="Home"))
+        assert engine.process_style_rules(None, "title-normal", fact).split() == [
+            "class:a",
+            "class:b",
+            "class:ta",
+        ]
+
+    def test_same_as_probing_every_ruleset(self):
+        """Make sure the rulesets index does not skip any matching ruleset."""
+        names = ["a", "b", "c", "d"]
+        rnd = random.Random(0)
+
+        def random_names():
+            return rnd.sample(names, rnd.randrange(3))
+
+        rules = {}
+        for idx in range(200):
+            rule = {"title-normal": "class:r{}".format(idx)}
+            for key in ("activity", "category", "tag"):
+                if rnd.random() < 0.2:
+                    rule[key] = rnd.choice(names)
+            for key in ("activities", "categories", "tags", "tags-all"):
+                if rnd.random() < 0.2:
+                    rule[key] = random_names()
+            rules["rule-{}".format(idx)] = rule
+        engine = StyleEngine(create_rules_confobj(rules))
+
+        def expect_triggered(rule, fact):
+            conditions = (
+                (fact.activity_name, ("activity", "activities"), any),
+                (fact.category_name, ("category", "categories"), any),
+                ([tag.name for tag in fact.tags], ("tag", "tags"), any),
+                ([tag.name for tag in fact.tags], ("tags-all",), all),
+            )
+            triggered = False
+            for fact_names, keys, any_or_all in conditions:
+                wanted = []
+                for key in keys:
+                    value = rule.get(key, [])
+                    wanted += [value] if isinstance(value, str) else value
+                if not wanted:
+                    continue
+                if isinstance(fact_names, str):
+                    fact_names = [fact_names]
+                if not any_or_all(name in fact_names for name in wanted):
+                    return False
+                triggered = True
+            return triggered
+
+        for _ in range(200):
+            fact = create_fact(rnd.choice(names), rnd.choice(names), random_names())
+            expected = "".join(
+                " " + rule["title-normal"]
+                for rule in rules.values()
+                if expect_triggered(rule, fact)
+            )
+            assert engine.process_style_rules(None, "title-normal", fact) == expected
+
+    def test_redraw_does_not_eval_again(self):
+        """Make sure the style results are remembered until the Fact is edited."""
+        rules = {
+            "by-eval": {
+                "__eval__": compile_rule_eval(
+                    "fact.evals.append(fact.description) or fact.description == 'foo'"
+                ),
+                "title-normal": "class:e",
+            },
+        }
+        engine = StyleEngine(create_rules_confobj(rules))
+        fact = create_fact("Dev", "Work", description="foo")
+        fact.evals = []
+        for _ in range(3):
+            label = Label(text="Dev")
+            assert engine.process_style_rules(label, "title-normal", fact) == " class:e"
+            assert label.formatted_text_control.style.endswith(" class:e")
+        assert fact.evals == ["foo"]
+
+        fact.description = "bar"
+        fact.dirty_reasons.add("description")
+        assert engine.process_style_rules(None, "title-normal", fact) == ""
+        assert fact.evals == ["foo", "bar"]
+
+    def test_eval_names_and_budget(self, capsys):
+        """Make sure an eval sees the Fact's names, and is disabled if too slow."""
+        rules = {
+            "fast": {
+                "__eval__": compile_rule_eval("activity == 'Dev' and 'foo' in tags"),
+                "title-normal": "class:fast",
+            },
+            "slow": {
+                "__eval__": compile_rule_eval("__import__('time').sleep(0.01) or 1"),
+                "title-normal": "class:slow",
+            },
+        }
+        engine = StyleEngine(create_rules_confobj(rules), eval_budget=5)
+        fact = create_fact("Dev", "Work", ["foo"])
+        assert engine.process_style_rules(None, "title-normal", fact).split() == [
+            "class:fast",
+            "class:slow",
+        ]
+        assert "over the budget of 5 ms" in capsys.readouterr().err
+        # The slow eval is disabled, like when an eval fails, so it's no
+        # longer run, and its ruleset, without other conditions, is unused.
+        other_fact = create_fact("Play", "Work", ["foo"])
+        assert engine.process_style_rules(None, "title-normal", other_fact) == ""
+        assert engine.rule_evals["slow"].calls == 1
+        assert engine.rule_evals["fast"].calls == 2
+        assert engine.rule_evals["slow"].elapsed >= 0.01
+
+    def test_load_style_engine_budget(self, controller_with_logging):
+        """Make sure the engine's eval budget is read from the config."""
+        controller = controller_with_logging
+        rules_confobj = create_rules_confobj({})
+        assert load_style_engine(controller, rules_confobj).eval_budget == 50
+        controller.config["editor.rules_eval_budget"] = 7
+        assert load_style_engine(controller, rules_confobj).eval_budget == 7
+
+    def test_eval_budget_from_config(self, controller_with_logging):
+        """Make sure an engine made without a budget reads the user's config."""
+        controller = controller_with_logging
+        rules_confobj = create_rules_confobj({})
+        # E.g., the Carousel makes its own StyleEngine, after the config is loaded.
+        assert StyleEngine(rules_confobj).eval_budget == 50
+        controller.config["editor.rules_eval_budget"] = 7
+        assert StyleEngine(rules_confobj).eval_budget == 7
+        assert StyleEngine(rules_confobj, eval_budget=0).eval_budget == 0
+
+    def test_compile_error_line_number(self):
+        """Make sure a syntax error reports the eval's own line number."""
+        with pytest.raises(SyntaxError) as excinfo:
+            compile_rule_eval("activity == 'Dev'\n  and tags +")
+        assert excinfo.value.lineno == 2
+        assert excinfo.value.text == "  and tags +"